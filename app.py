@@ -1,63 +1,81 @@
 # -*- coding: utf-8 -*-
 import sys
+import multiprocessing
 from pathlib import Path
-from datetime import datetime
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 import os
 
-from PySide6.QtCore import Qt, QSettings, Signal, QObject, QByteArray
-from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtCore import Qt, QSettings, Signal, QObject, QByteArray, QAbstractListModel, QModelIndex, QTimer
+from PySide6.QtGui import QAction, QKeySequence, QTextCursor
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QFileDialog, QSplitter, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QListWidget, QListWidgetItem, QFrame, QLineEdit,
-    QMessageBox, QPlainTextEdit, QProgressBar, QSizePolicy
+    QMessageBox, QPlainTextEdit, QProgressBar, QCheckBox, QInputDialog, QListView, QComboBox
 )
 
 APP_ORG = "DeepParser"
 APP_NAME = "Парсер веб-новелл"
 DEFAULT_ACCENT = "#00E5FF"
 
-from site_profiles import detect_profile
-from utils_docx import save_chapter_docx
-from translators import GeminiTranslator
-
-def ensure_dir(p: Path):
-    p.mkdir(parents=True, exist_ok=True)
-    return p
+# Тяжёлые модули (requests, bs4/lxml, SDK переводчиков) импортируются при первом использовании,
+# чтобы окно появлялось сразу: парсер — при первом парсинге, DOCX/экспорт — при экспорте,
+# переводчик — при первом переводе. Замер: benchmarks/bench_startup.py
+from project_store import ProjectStore, ensure_dir
+from jobs import Scheduler
 
 class Signals(QObject):
     progress = Signal(int, str)
     done = Signal(str)
     error = Signal(str)
-
-class ProjectStore:
-    def __init__(self, workdir: Path):
-        self.workdir = workdir
-        self.db = ensure_dir(workdir) / "config.db"
-        import sqlite3
-        conn = sqlite3.connect(self.db); cur = conn.cursor()
-        cur.execute("""CREATE TABLE IF NOT EXISTS projects(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            status TEXT NOT NULL DEFAULT 'active',
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        );""")
-        conn.commit(); conn.close()
-    def list(self, status="active"):
-        import sqlite3
-        conn = sqlite3.connect(self.db); cur = conn.cursor()
-        cur.execute("SELECT id,name,status,created_at,updated_at FROM projects WHERE status=? ORDER BY id DESC",(status,))
-        rows = cur.fetchall(); conn.close(); return rows
-    def create(self, name: str):
-        import sqlite3
-        now = datetime.utcnow().isoformat()
-        conn = sqlite3.connect(self.db); cur = conn.cursor()
-        cur.execute("INSERT INTO projects(name,status,created_at,updated_at) VALUES(?, 'active', ?, ?)", (name, now, now))
-        conn.commit(); pid = cur.lastrowid; conn.close()
-        base = ensure_dir(self.workdir / name)
-        ensure_dir(base / "Original"); ensure_dir(base / "Translation")
-        return pid
+    exported = Signal(str)
+    translated = Signal(str)
+    translated_part = Signal(str)
+    translate_error = Signal(str)
+    book_translated = Signal(str)
+    export_error = Signal(str)
+
+class PagedListModel(QAbstractListModel):
+    """Ленивый список: строки подгружаются из config.db страницами по мере прокрутки.
+
+    fetch(last_row | None, limit) → строки следующей страницы; label(row) → текст строки.
+    Сама строка отдаётся по Qt.UserRole.
+    """
+    PAGE = 200
+
+    def __init__(self, fetch, label, parent=None):
+        super().__init__(parent); self._fetch=fetch; self._label=label; self._rows=[]; self._more=True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole: return self._label(row)
+        if role == Qt.UserRole: return row
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._more: return
+        rows = self._fetch(self._rows[-1] if self._rows else None, self.PAGE)
+        self._more = len(rows) == self.PAGE
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows)+len(rows)-1)
+            self._rows.extend(rows); self.endInsertRows()
+
+    def reload(self, fetch=None):
+        self.beginResetModel()
+        if fetch is not None: self._fetch = fetch
+        self._rows = []; self._more = True
+        self.endResetModel()
+
+def lazy_list_view(model: PagedListModel) -> QListView:
+    view = QListView(); view.setModel(model); view.setUniformItemSizes(True)
+    view.setEditTriggers(QListView.NoEditTriggers)
+    return view
 
 class ProjectPanel(QFrame):
     def __init__(self, store: ProjectStore, on_select):
@@ -74,68 +92,176 @@ class ProjectPanel(QFrame):
         head = QHBoxLayout(); head.addWidget(QLabel("Проекты"))
         self.btn_add = QPushButton("+"); self.btn_add.setFixedWidth(28); self.btn_add.clicked.connect(self._add)
         head.addStretch(1); head.addWidget(self.btn_add); pv.addLayout(head)
-        self.active = QListWidget(); self.active.setMinimumHeight(120)
-        self.active.itemClicked.connect(lambda it:self.on_select(it.data(Qt.UserRole)))
+        self.active_model = PagedListModel(self._page("active"), lambda r: r[1], self)
+        self.active = lazy_list_view(self.active_model); self.active.setMinimumHeight(120)
+        self.active.clicked.connect(lambda ix:self.on_select(ix.data(Qt.UserRole)[0]))
         pv.addWidget(self.active)
 
         # Archive block
         arch_block = QFrame(); av = QVBoxLayout(arch_block); av.setContentsMargins(0,0,0,0); av.setSpacing(6)
         arch_head = QHBoxLayout(); arch_head.addWidget(QLabel("Архив")); arch_head.addStretch(1); av.addLayout(arch_head)
-        self.archive = QListWidget(); self.archive.setMinimumHeight(80)
-        self.archive.itemClicked.connect(lambda it:self.on_select(it.data(Qt.UserRole)))
+        self.archive_model = PagedListModel(self._page("archived"), lambda r: r[1], self)
+        self.archive = lazy_list_view(self.archive_model); self.archive.setMinimumHeight(80)
+        self.archive.clicked.connect(lambda ix:self.on_select(ix.data(Qt.UserRole)[0]))
         av.addWidget(self.archive)
 
         self.left_split.addWidget(proj_block)
         self.left_split.addWidget(arch_block)
         self.left_split.setSizes([300,150])
 
-        self.refresh()
+    def _page(self, status: str):
+        return lambda last, limit: self.store.projects_page(status, last[0] if last else None, limit)
 
     def refresh(self):
-        self.active.clear(); self.archive.clear()
-        for r in self.store.list("active"):
-            it=QListWidgetItem(r[1]); it.setData(Qt.UserRole, r[0]); self.active.addItem(it)
-        for r in self.store.list("archived"):
-            it=QListWidgetItem(r[1]); it.setData(Qt.UserRole, r[0]); self.archive.addItem(it)
+        self.active_model.reload(); self.archive_model.reload()
 
     def _add(self):
-        from PySide6.QtWidgets import QInputDialog
         name, ok = QInputDialog.getText(self,"Новый проект","Название:")
         if ok and name.strip():
             self.store.create(name.strip())
             self.refresh()
 
+class ChapterPanel(QFrame):
+    """Главы выбранной книги проекта; список тоже ленивый. on_open(project_id, book, (idx, url, title, path))."""
+    def __init__(self, store: ProjectStore, on_open, on_translate_book):
+        super().__init__(); self.store=store; self.on_open=on_open; self.project_id=None
+        v = QVBoxLayout(self); v.setContentsMargins(0,0,0,0); v.setSpacing(6)
+        head = QHBoxLayout(); head.addWidget(QLabel("Главы")); self.book = QComboBox(); head.addWidget(self.book,1)
+        self.btn_translate = QPushButton("⇄"); self.btn_translate.setFixedWidth(28); self.btn_translate.setToolTip("Перевести всю книгу (повторно — остановить)")
+        self.btn_translate.clicked.connect(lambda: self.book.currentText() and on_translate_book(self.project_id, self.book.currentText()))
+        head.addWidget(self.btn_translate); v.addLayout(head)
+        self.model = PagedListModel(lambda last, limit: [], lambda r: f"{r[0]:03d} {r[2]}", self)
+        self.list = lazy_list_view(self.model); self.list.setMinimumHeight(80); v.addWidget(self.list)
+        self.book.currentTextChanged.connect(self._show_book)
+        self.list.clicked.connect(lambda ix: self.on_open(self.project_id, self.book.currentText(), ix.data(Qt.UserRole)))
+
+    def bind(self, project_id: int|None):
+        self.project_id = project_id
+        self.refresh()
+
+    def refresh(self):
+        current = self.book.currentText()
+        books = self.store.books(self.project_id) if self.project_id is not None else []
+        self.book.blockSignals(True); self.book.clear(); self.book.addItems(books)
+        if current in books: self.book.setCurrentText(current)
+        self.book.blockSignals(False)
+        self._show_book(self.book.currentText())
+
+    def _show_book(self, book: str):
+        pid = self.project_id
+        if pid is None or not book:
+            self.model.reload(lambda last, limit: []); return
+        self.model.reload(lambda last, limit: self.store.chapters_page(pid, book, last[0] if last else None, limit))
+
+class QueueSignals(QObject):
+    changed = Signal()
+    progress = Signal(int, int, int)
+
+JOB_STATUS = {"queued": "в очереди", "running": "качается", "paused": "пауза", "done": "готово", "failed": "ошибка"}
+
+class QueuePanel(QFrame):
+    def __init__(self, scheduler: Scheduler, signals: QueueSignals):
+        super().__init__(); self.scheduler=scheduler; self._progress={}
+        v = QVBoxLayout(self); v.setContentsMargins(0,0,0,0); v.setSpacing(6)
+        head = QHBoxLayout(); head.addWidget(QLabel("Очередь")); head.addStretch(1)
+        for text, tip, slot in (("▲","Выше",lambda: self._move(-1)), ("▼","Ниже",lambda: self._move(1)),
+                                ("★","Приоритет",self._toggle_priority), ("⏯","Пауза/продолжить",self._toggle_pause),
+                                ("✕","Убрать из очереди",self._remove)):
+            b = QPushButton(text); b.setFixedWidth(28); b.setToolTip(tip); b.clicked.connect(slot); head.addWidget(b)
+        v.addLayout(head)
+        self.list = QListWidget(); self.list.setMinimumHeight(80); v.addWidget(self.list)
+        signals.changed.connect(self.refresh)
+        signals.progress.connect(self._on_progress)
+        self.refresh()
+
+    def refresh(self):
+        cur = self._current()
+        self.list.clear()
+        for jid, url, _, _, _, prio, _, status, _, error in self.scheduler.store.list_jobs():
+            text = ("★ " if prio else "") + url + " — " + JOB_STATUS.get(status, status)
+            if status == "running" and jid in self._progress: text += " %d/%d" % self._progress[jid]
+            it = QListWidgetItem(text); it.setData(Qt.UserRole, (jid, prio, status))
+            if error: it.setToolTip(error)
+            self.list.addItem(it)
+            if cur and cur[0] == jid: self.list.setCurrentItem(it)
+
+    def _on_progress(self, jid: int, n: int, total: int):
+        self._progress[jid] = (n, total)
+        for row in range(self.list.count()):
+            it = self.list.item(row)
+            if it.data(Qt.UserRole)[0] == jid:
+                it.setText(it.text().rsplit(" — ", 1)[0] + f" — {JOB_STATUS['running']} {n}/{total}")
+
+    def _current(self):
+        it = self.list.currentItem()
+        return it.data(Qt.UserRole) if it else None
+
+    def _move(self, delta: int):
+        cur = self._current()
+        if cur: self.scheduler.move(cur[0], delta)
+
+    def _toggle_priority(self):
+        cur = self._current()
+        if cur: self.scheduler.set_priority(cur[0], 0 if cur[1] else 1)
+
+    def _toggle_pause(self):
+        cur = self._current()
+        if not cur: return
+        if cur[2] in ("queued", "running"): self.scheduler.pause(cur[0])
+        else: self.scheduler.resume(cur[0])
+
+    def _remove(self):
+        cur = self._current()
+        if cur: self.scheduler.remove(cur[0])
+
 class ParserPanel(QFrame):
-    def __init__(self, on_parse, on_pause, on_stop, on_translate):
+    def __init__(self, on_parse, on_enqueue, on_pause, on_stop, on_resume, on_translate, on_export):
         super().__init__()
         lay = QHBoxLayout(self); lay.setContentsMargins(8,8,8,8); lay.setSpacing(8)
         self.url = QLineEdit(); self.url.setPlaceholderText("Вставьте ссылку на книгу…")
         self.btn_parse = QPushButton("Спарсить")
+        self.btn_enqueue = QPushButton("В очередь")
         self.btn_pause = QPushButton("Пауза")
         self.btn_stop = QPushButton("Стоп")
+        self.btn_resume = QPushButton("Докачать")
+        self.btn_resume.setToolTip("Продолжить прерванную загрузку с места остановки")
         self.btn_translate = QPushButton("Перевести")
+        self.btn_export = QPushButton("Экспорт")
+        self.btn_export.setToolTip("Собрать книгу в один файл: DOCX, EPUB или Markdown (Ctrl+Shift+E)")
+        self.only_new = QCheckBox("Только новые")
+        self.only_new.setToolTip("Качать только главы, которых ещё нет в проекте")
         self.progress = QProgressBar(); self.progress.setMinimum(0); self.progress.setMaximum(100)
         self.btn_parse.clicked.connect(lambda: on_parse(self.url.text().strip()))
+        self.btn_enqueue.clicked.connect(lambda: on_enqueue(self.url.text().strip()))
         self.btn_pause.clicked.connect(on_pause)
         self.btn_stop.clicked.connect(on_stop)
+        self.btn_resume.clicked.connect(on_resume)
         self.btn_translate.clicked.connect(on_translate)
-        lay.addWidget(QLabel("Ссылка:")); lay.addWidget(self.url,1); lay.addWidget(self.btn_parse)
-        lay.addWidget(self.btn_pause); lay.addWidget(self.btn_stop); lay.addWidget(self.btn_translate); lay.addWidget(self.progress,1)
+        self.btn_export.clicked.connect(on_export)
+        lay.addWidget(QLabel("Ссылка:")); lay.addWidget(self.url,1); lay.addWidget(self.only_new); lay.addWidget(self.btn_parse); lay.addWidget(self.btn_enqueue)
+        lay.addWidget(self.btn_pause); lay.addWidget(self.btn_stop); lay.addWidget(self.btn_resume); lay.addWidget(self.btn_translate); lay.addWidget(self.btn_export); lay.addWidget(self.progress,1)
 
 class EditorArea(QFrame):
-    def __init__(self):
+    def __init__(self, store: ProjectStore, scheduler: Scheduler):
         super().__init__()
+        self.store = store
+        self.scheduler = scheduler
         self.signals = Signals()
         self._thread = None
+        self._export_thread = None
+        self._tr_thread = None; self._tr_cancel = Event()
+        self._book_thread = None; self._book_stop = Event()
+        self._glossary_cache = (None, None, None)  # (путь, mtime, GlossaryIndex)
+        self._translator = None; self._translator_ready = False; self._translator_lock = Lock()
+        self._prefetcher = None
         self._pause = Event(); self._stop = Event()
         self._pause.clear(); self._stop.clear()
         self.project_path: Path|None = None
+        self.project_id: int|None = None
 
-        api_key = os.getenv("GEMINI_API_KEY")
-        self.translator = GeminiTranslator(api_key) if api_key else None
 
         v = QVBoxLayout(self); v.setContentsMargins(8,8,8,8); v.setSpacing(8)
-        self.panel = ParserPanel(self._start_parse, self._toggle_pause, self._stop_parse, self._translate_current)
+        self.panel = ParserPanel(self._start_parse, self._enqueue, self._toggle_pause, self._stop_parse, self._resume_parse, self._translate_current, self._export_book)
         v.addWidget(self.panel)
 
         self.split = QSplitter(Qt.Vertical); v.addWidget(self.split,1)
@@ -149,42 +275,164 @@ class EditorArea(QFrame):
         self.signals.progress.connect(self._on_progress)
         self.signals.done.connect(self._on_done)
         self.signals.error.connect(self._on_error)
-
-    def bind_project(self, project_path: Path):
+        self.signals.exported.connect(self._on_exported)
+        self.signals.translated.connect(self._on_translated)
+        self.signals.translated_part.connect(self._on_translated_part)
+        self.signals.translate_error.connect(self._on_translate_error)
+        self.signals.book_translated.connect(lambda msg: QMessageBox.information(self, "Перевод книги", msg))
+        self.signals.export_error.connect(lambda err: QMessageBox.critical(self, "Ошибка экспорта", err))
+
+    def bind_project(self, project_path: Path, project_id: int|None = None):
         self.project_path = project_path
+        self.project_id = project_id
+
+    @property
+    def translator(self):
+        """Переводчик создаётся при первом обращении (SDK бэкендов тяжёлые); None — не настроен."""
+        with self._translator_lock:
+            if not self._translator_ready:
+                from book_translate import load_translation_config
+                from translators import MemoryTranslator, TranslationMemory, build_translator
+                # Основной бэкенд + запасные из SETTINGS.json (translation.provider/fallback)
+                engine = build_translator(load_translation_config(), os.getenv("GEMINI_API_KEY"))
+                # Память переводов общая для рабочей папки: повторяющиеся абзацы не уходят в API
+                self._translator = MemoryTranslator(engine, TranslationMemory(self.store.workdir / ".cache" / "tm.db")) if engine else None
+                self._translator_ready = True
+            return self._translator
+
+    @translator.setter
+    def translator(self, value):
+        with self._translator_lock:
+            self._translator, self._translator_ready = value, True
+
+    @property
+    def prefetcher(self):
+        if self._prefetcher is None:
+            from prefetch import ChapterPrefetcher
+            self._prefetcher = ChapterPrefetcher(self.store)
+        return self._prefetcher
+
+    def glossary(self):
+        """Глоссарий проекта (<проект>/glossary.txt), скомпилированный один раз и заново — после правки файла."""
+        path = (self.project_path or Path.cwd()) / "glossary.txt"
+        if not path.exists(): return None
+        mtime = path.stat().st_mtime
+        if self._glossary_cache[:2] != (path, mtime):
+            from translators import GlossaryIndex
+            self._glossary_cache = (path, mtime, GlossaryIndex.load(path))
+        return self._glossary_cache[2]
+
+    def open_chapter(self, project_id: int, book: str, row):
+        """Открывает главу слева: текст из config.db, а если его там нет — из DOCX.
+
+        Если глава уже подготовлена в фоне (prefetch.py), справа сразу появляется её перевод;
+        после открытия начинается подготовка следующих глав.
+        """
+        idx, url, title, path = row
+        prompt, glossary = self.prompt.toPlainText().strip(), self.glossary()
+        pre = self.prefetcher.get(project_id, book, url)
+        stored = None if pre else self.store.chapter_text(project_id, book, url)
+        try:
+            if pre: title, lines = pre.title, pre.text.split("\n")
+            elif stored: title, lines = stored[0], stored[1].split("\n")
+            else:
+                from book_export import read_chapter_docx
+                title, lines = read_chapter_docx(Path(path))
+        except OSError as e:
+            QMessageBox.warning(self, "Глава недоступна", str(e)); return
+        self.orig.setPlainText(title + "\n\n" + "\n".join(lines))
+        if not (self._tr_thread and self._tr_thread.is_alive()):
+            self.tran.setPlainText((pre.translation_for(prompt, glossary) if pre else None) or "")
+        # Переводчик — функцией: если его ещё нет, он создастся в фоновом потоке, а не в интерфейсе
+        self.prefetcher.schedule(lambda: self.translator, project_id, book, url, prompt, glossary)
 
     def _start_parse(self, url: str):
         if not url: QMessageBox.warning(self,"Нет ссылки","Вставьте ссылку."); return
+        from site_profiles import detect_profile
+        from crawler import start_crawl
+        prof = detect_profile(url)
+        if not prof: QMessageBox.warning(self,"Неизвестный сайт","Пока не поддерживается."); return
+        if self._thread and self._thread.is_alive():
+            self._enqueue(url); return
+
+        base = self.project_path or Path.cwd()
+        pid = self.project_id
+        if self.scheduler.is_downloading(url, pid) or self.store.crawl_active(pid, url):
+            QMessageBox.information(self,"Уже качается","Эта книга уже загружается в очереди."); return
+        only_new = self.panel.only_new.isChecked()
+        self._launch(lambda: start_crawl(self.store, prof, url, base, pid, only_new, **self._crawl_kw()))
+
+    def _resume_parse(self):
+        if self._busy(): return
+        job = self.store.unfinished_crawl(self.project_id)
+        if not job: QMessageBox.information(self,"Нечего докачивать","Прерванных загрузок в проекте нет."); return
+        cid, url = job[0], job[1]
+        from site_profiles import detect_profile
+        from crawler import resume_crawl
         prof = detect_profile(url)
         if not prof: QMessageBox.warning(self,"Неизвестный сайт","Пока не поддерживается."); return
-        if self._thread and self._thread.is_alive(): QMessageBox.information(self,"Идёт парсинг","Дождитесь завершения/остановите."); return
 
+        pid = self.project_id
+        self._launch(lambda: resume_crawl(self.store, prof, cid, pid, **self._crawl_kw()))
+
+    def _enqueue(self, url: str):
+        if not url: QMessageBox.warning(self,"Нет ссылки","Вставьте ссылку."); return
+        from site_profiles import detect_profile
+        if not detect_profile(url): QMessageBox.warning(self,"Неизвестный сайт","Пока не поддерживается."); return
+        self.scheduler.add(url, self.project_id, self.project_path or Path.cwd(), self.panel.only_new.isChecked())
+        QMessageBox.information(self,"Очередь","Книга добавлена в очередь загрузки.")
+
+    def _busy(self) -> bool:
+        if self._thread and self._thread.is_alive():
+            QMessageBox.information(self,"Идёт парсинг","Дождитесь завершения/остановите."); return True
+        return False
+
+    def _crawl_kw(self):
+        def progress(n, total, ch):
+            self.signals.progress.emit(int((n-1)/total*100), f"Глава {n}/{total}: {ch.title}")
+        return dict(pause=self._pause, stop=self._stop, progress=progress)
+
+    def _launch(self, run):
+        """Запускает run() → CrawlResult в рабочем потоке и сообщает итог через сигналы."""
         self._pause.clear(); self._stop.clear()
 
         def worker():
             try:
-                book, chapters = prof.parse_book(url)
-                if not chapters: self.signals.error.emit("Не удалось найти главы."); return
-                base = self.project_path or Path.cwd()
-                target = ensure_dir(base / "Original" / book)
-                total = len(chapters)
-                for i, ch in enumerate(chapters, start=1):
-                    while self._pause.is_set():
-                        import time; time.sleep(0.2)
-                        if self._stop.is_set(): break
-                    if self._stop.is_set(): break
-
-                    self.signals.progress.emit(int((i-1)/total*100), f"Глава {i}/{total}: {ch.title}")
-                    title, body = prof.fetch_chapter(ch.url)
-                    save_chapter_docx(target, title or ch.title, body or "", index=i)
-                if not self._stop.is_set():
+                res = run()
+                if res.count == 0:
+                    self.signals.progress.emit(100, "Новых глав нет")
+                    self.signals.done.emit(str(res.target))
+                elif res.finished:
                     self.signals.progress.emit(100, "Готово")
-                    self.signals.done.emit(str(target))
+                    self.signals.done.emit(str(res.target))
             except Exception as e:
                 self.signals.error.emit(str(e))
 
         self._thread = Thread(target=worker, daemon=True); self._thread.start()
 
+    def _export_book(self):
+        if self._export_thread and self._export_thread.is_alive():
+            QMessageBox.information(self,"Идёт экспорт","Дождитесь завершения."); return
+        base = self.project_path or Path.cwd()
+        folder = QFileDialog.getExistingDirectory(self, "Папка книги", str(base / "Original"))
+        if not folder: return
+        from book_export import FORMATS, export_book
+        fmt, ok = QInputDialog.getItem(self, "Экспорт книги", "Формат:", [f.upper() for f in FORMATS], 0, False)
+        if not ok: return
+        store, pid = self.store, self.project_id
+
+        def progress(n, total, title):
+            self.signals.progress.emit(int(n/total*100), f"Экспорт {n}/{total}: {title}")
+
+        def worker():
+            try:
+                path = export_book(Path(folder), fmt.lower(), store=store, project_id=pid, progress=progress)
+                self.signals.exported.emit(str(path))
+            except Exception as e:
+                self.signals.export_error.emit(str(e))
+
+        self._export_thread = Thread(target=worker, daemon=True); self._export_thread.start()
+
     def _toggle_pause(self):
         if self._pause.is_set():
             self._pause.clear()
@@ -199,19 +447,87 @@ class EditorArea(QFrame):
         self.panel.btn_pause.setText("Пауза")
 
     def _translate_current(self):
+        """Переводит главу в рабочем потоке: текст режется на куски по абзацам, куски идут параллельно.
+
+        Перевод появляется в правой панели по мере генерации (стриминг), а не после ответа целиком.
+        Повторное нажатие во время перевода отменяет его.
+        """
+        if self._tr_thread and self._tr_thread.is_alive():
+            self._tr_cancel.set(); self.panel.btn_translate.setEnabled(False); return
         if not self.translator:
-            QMessageBox.warning(self, "Нет ключа", "Укажите переменную окружения GEMINI_API_KEY")
+            QMessageBox.warning(self, "Нет переводчика", "Укажите переменную окружения GEMINI_API_KEY или бэкенд local в SETTINGS.json (translation.provider)")
             return
         text = self.orig.toPlainText().strip()
         if not text:
             QMessageBox.information(self, "Нет текста", "Слева нет текста для перевода")
             return
-        try:
-            prompt = self.prompt.toPlainText().strip()
-            result = self.translator.translate(text, prompt=prompt)
-            self.tran.setPlainText(result)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка перевода", str(e))
+        prompt, glossary = self.prompt.toPlainText().strip(), self.glossary()
+        translator, cancel = self.translator, self._tr_cancel
+        cancel.clear()
+
+        def progress(done, total):
+            self.signals.progress.emit(int(done/total*100), f"Перевод {done}/{total}")
+
+        from translators import TranslationCancelled, stream_chunked
+
+        def worker():
+            try:
+                parts = []
+                for delta in stream_chunked(translator, text, cancel=cancel, progress=progress, prompt=prompt, glossary=glossary):
+                    parts.append(delta); self.signals.translated_part.emit(delta)
+                self.signals.translated.emit("".join(parts))
+            except TranslationCancelled:
+                self.signals.translate_error.emit("")
+            except Exception as e:
+                self.signals.translate_error.emit(str(e))
+
+        self.panel.btn_translate.setText("Отмена")
+        self.tran.clear()
+        self.signals.progress.emit(0, "Перевод…")
+        self._tr_thread = Thread(target=worker, daemon=True); self._tr_thread.start()
+
+    def translate_book(self, project_id: int, book: str):
+        """Переводит все главы книги в фоне (Translation/<книга>); повторный вызов останавливает перевод."""
+        if self._book_thread and self._book_thread.is_alive():
+            self._book_stop.set(); return
+        if not self.translator:
+            QMessageBox.warning(self, "Нет переводчика", "Укажите переменную окружения GEMINI_API_KEY или бэкенд local в SETTINGS.json (translation.provider)")
+            return
+        base = self.project_path or Path.cwd()
+        translator, stop, prompt, glossary = self.translator, self._book_stop, self.prompt.toPlainText().strip(), self.glossary()
+        stop.clear()
+
+        import book_translate
+
+        def progress(n, total, title):
+            self.signals.progress.emit(int(n/total*100), f"Перевод книги {n}/{total}: {title}")
+
+        def worker():
+            try:
+                res = book_translate.translate_book(self.store, translator, project_id, book, base, prompt=prompt, glossary=glossary, stop=stop, progress=progress)
+                msg = f"Переведено глав: {res.translated}, уже было: {res.skipped}."
+                if res.errors: msg += f"\nОшибки в {len(res.errors)} гл. (первая — {res.errors[0][0]}: {res.errors[0][1]}); повторный запуск переведёт их."
+                if not res.finished: msg += "\nПеревод остановлен; повторный запуск продолжит с места остановки."
+                self.signals.book_translated.emit(msg + f"\n\n{res.target}")
+            except Exception as e:
+                self.signals.translate_error.emit(str(e))
+
+        self.signals.progress.emit(0, f"Перевод книги: {book}")
+        self._book_thread = Thread(target=worker, daemon=True); self._book_thread.start()
+
+    def _on_translated_part(self, delta: str):
+        cur = QTextCursor(self.tran.document()); cur.movePosition(QTextCursor.End)
+        cur.insertText(delta)
+
+    def _on_translated(self, result: str):
+        self.panel.btn_translate.setText("Перевести"); self.panel.btn_translate.setEnabled(True)
+        if self.tran.toPlainText() != result: self.tran.setPlainText(result)
+
+    def _on_translate_error(self, err: str):
+        """Пустая строка — перевод отменён пользователем."""
+        self.panel.btn_translate.setText("Перевести"); self.panel.btn_translate.setEnabled(True)
+        if err: QMessageBox.critical(self, "Ошибка перевода", err)
+        else: self.signals.progress.emit(0, "Перевод отменён")
 
     def _on_progress(self, p: int, msg: str):
         self.panel.progress.setValue(p); self.panel.progress.setFormat(msg+" (%p%)")
@@ -222,6 +538,9 @@ class EditorArea(QFrame):
     def _on_error(self, err: str):
         QMessageBox.critical(self, "Ошибка парсинга", err)
 
+    def _on_exported(self, path: str):
+        QMessageBox.information(self, "Экспорт завершён", f"Книга сохранена в:\n{path}")
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -230,6 +549,9 @@ class MainWindow(QMainWindow):
 
         self.workdir = self._ensure_workdir()
         self.store = ProjectStore(Path(self.workdir))
+        self.queue_signals = QueueSignals()
+        self.scheduler = Scheduler(self.store, on_change=self.queue_signals.changed.emit,
+                                   on_progress=self.queue_signals.progress.emit)
 
         root = QWidget(); self.setCentralWidget(root)
         lay = QVBoxLayout(root); lay.setContentsMargins(0,0,0,0); lay.setSpacing(0)
@@ -246,7 +568,14 @@ class MainWindow(QMainWindow):
         self.main_split = QSplitter(Qt.Horizontal); lay.addWidget(self.main_split,1)
         self.left_panel = ProjectPanel(self.store, on_select=self._bind_project)
         self.main_split.addWidget(self.left_panel)
-        self.editor = EditorArea(); self.main_split.addWidget(self.editor)
+        self.queue_panel = QueuePanel(self.scheduler, self.queue_signals)
+        self.left_panel.left_split.addWidget(self.queue_panel)
+        self.editor = EditorArea(self.store, self.scheduler)
+        self.chapter_panel = ChapterPanel(self.store, on_open=self.editor.open_chapter, on_translate_book=self.editor.translate_book)
+        self.left_panel.left_split.insertWidget(2, self.chapter_panel); self.left_panel.left_split.setSizes([250,120,250,150])
+        self.editor.signals.done.connect(lambda _: self.chapter_panel.refresh())
+        self.queue_signals.changed.connect(self.chapter_panel.refresh)
+        self.main_split.addWidget(self.editor)
         self.main_split.setCollapsible(0, True)
         self.main_split.setSizes([280, 1120])
 
@@ -254,12 +583,26 @@ class MainWindow(QMainWindow):
         act_toggle = QAction("Скрыть/показать левую панель", self); act_toggle.setShortcut(QKeySequence("Ctrl+B")); act_toggle.triggered.connect(self._toggle_left_panel); self.addAction(act_toggle)
         act_full = QAction("Полноэкранный", self); act_full.setShortcut(QKeySequence("F11")); act_full.triggered.connect(self._toggle_fullscreen); self.addAction(act_full)
         act_esc = QAction("Выход из полноэкранного", self); act_esc.setShortcut(QKeySequence("Esc")); act_esc.triggered.connect(self._exit_fullscreen); self.addAction(act_esc)
+        act_export = QAction("Экспорт книги", self); act_export.setShortcut(QKeySequence("Ctrl+Shift+E")); act_export.triggered.connect(self.editor._export_book); self.addAction(act_export)
 
         # Restore splitter state
         bs = self.settings.value("ui/main_split_state", None)
         if isinstance(bs, QByteArray):
             self.main_split.restoreState(bs)
 
+        QTimer.singleShot(0, self._start_network)
+
+    def _start_network(self):
+        """После появления окна: HTTP-слой (requests, прокси, кэш ответов) и очередь загрузок."""
+        import http_client
+        http_client.configure(proxies=http_client.load_proxies())
+        http_client.use_cache(Path(self.workdir) / ".cache" / "http.db")
+        self.scheduler.start()
+
+    def closeEvent(self, ev):
+        self.scheduler.shutdown()
+        super().closeEvent(ev)
+
     def _toggle_left_panel(self):
         if self.left_panel.isVisible():
             self.main_split.setSizes([0, 1])
@@ -290,11 +633,11 @@ class MainWindow(QMainWindow):
         self.settings.setValue("app/workdir", chosen); return chosen
 
     def _bind_project(self, pid: int):
-        rows = self.store.list("active")
-        name = next((r[1] for r in rows if r[0]==pid), None)
-        if name: self.editor.bind_project(Path(self.workdir)/name)
+        row = self.store.get(pid)
+        if row: self.editor.bind_project(Path(self.workdir)/row[1], pid); self.chapter_panel.bind(pid)
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setOrganizationName(APP_ORG); app.setApplicationName(APP_NAME)
     w = MainWindow(); w.show()
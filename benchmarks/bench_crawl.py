@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+bench_crawl.py — сквозная скорость загрузки книги через локальный HTTP-сервер
+
+    python benchmarks/bench_crawl.py [--chapters 100] [--profile royalroad] [--concurrency N]
+                                     [--json out.json] [--baseline base.json]
+    python benchmarks/bench_crawl.py --mock [--latency 50] [--fail-429 0.05] [--concurrency N]
+
+Поднимает на 127.0.0.1 сервер, который отдаёт сохранённые страницы профиля:
+на адрес книги — <профиль>_toc.html, на любой другой — <профиль>_chapter.html.
+Затем crawler.start_crawl качает первые --chapters глав целиком — оглавление,
+загрузка, разбор, DOCX и журнал в config.db — и печатает глав в секунду.
+Лимит запросов к 127.0.0.1 снят (--rate), чтобы мерить сам конвейер, а не паузы.
+
+С --mock книги RoyalRoad и Webnovel качаются с mock_site.py через прокси — с лимитами
+профилей, задержкой ответа (--latency) и ответами 429 (--fail-429): так подбираются
+concurrency и лимиты запросов под поведение настоящего сайта.
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from bench_profiles import BOOK_URL
+from common import add_arguments, fixture, profile_key, report
+
+import http_client
+import mock_site
+import site_profiles
+from crawler import start_crawl
+from project_store import ProjectStore
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Отдаёт toc на book_path и chapter на всё остальное."""
+    daemon_threads = True
+
+    def __init__(self, book_path: str, toc: str, chapter: str):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.book_path = book_path
+        self.pages = {"toc": toc.encode("utf-8"), "chapter": chapter.encode("utf-8")}
+        self.bytes = 0
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, как у настоящих сайтов
+
+    def do_GET(self):
+        srv = self.server
+        path = urllib.parse.urlparse(self.path).path
+        body = srv.pages["toc" if path.rstrip("/") == srv.book_path.rstrip("/") else "chapter"]
+        srv.bytes += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+MOCK_URL = {"royalroad": "http://www.royalroad.com/fiction/1/mock", "webnovel": "http://www.webnovel.com/book/mock_1"}
+
+
+def run_crawl(prof, url: str, chapters: int, concurrency=None) -> dict:
+    stop = threading.Event()
+
+    def progress(n, total, ch):
+        if n >= chapters:
+            stop.set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProjectStore(Path(tmp))
+        t = time.perf_counter()
+        res = start_crawl(store, prof, url, Path(tmp), stop=stop, progress=progress, concurrency=concurrency)
+        elapsed = time.perf_counter() - t
+        saved = len(list(res.target.glob("*.docx")))
+        store.close()
+    return {"chapters": saved, "seconds": elapsed}
+
+
+def crawl(prof, chapters: int, concurrency=None) -> dict:
+    key = profile_key(prof)
+    book = urllib.parse.urlparse(BOOK_URL[key])
+    srv = FixtureServer(book.path, fixture(f"{key}_toc.html"), fixture(f"{key}_chapter.html"))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        r = run_crawl(prof, srv.base + book.path, chapters, concurrency)
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    return {**r, "mb": srv.bytes / 2 ** 20}
+
+
+def crawl_mock(key: str, chapters: int, concurrency, config: mock_site.MockConfig) -> dict:
+    """Книга с mock_site через прокси: адрес настоящего сайта, лимиты профиля."""
+    srv = mock_site.MockSite(config).start()
+    http_client.configure(proxies={"http": srv.base})
+    try:
+        url = MOCK_URL[key]
+        r = run_crawl(site_profiles.detect_profile(url), url, chapters, concurrency)
+    finally:
+        http_client.configure(proxies={})
+        srv.stop()
+    return {**r, "mb": srv.stats["bytes"] / 2 ** 20, "throttled": srv.stats["throttled"]}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--chapters", type=int, default=100, help="сколько глав качать с каждого профиля")
+    ap.add_argument("--profile", action="append", help="только эти профили (можно несколько раз)")
+    ap.add_argument("--concurrency", type=int, help="потоков загрузки (по умолчанию — как у профиля)")
+    ap.add_argument("--rate", type=float, default=10_000.0, help="лимит запросов в секунду к 127.0.0.1")
+    ap.add_argument("--mock", action="store_true", help="качать с mock_site.py с лимитами профилей")
+    ap.add_argument("--latency", type=float, default=50.0, help="--mock: задержка ответа, мс")
+    ap.add_argument("--fail-429", type=float, default=0.0, help="--mock: доля ответов 429")
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    if args.mock:
+        return mock_main(args)
+    http_client.limiter.register(["127.0.0.1"], args.rate, max(1, int(args.rate)))
+    results = {}
+    print(f"{'профиль':<12} {'глав':>5} {'сек':>7} {'глав/с':>8} {'МБ/с':>7}")
+    for prof in site_profiles.PROFILES:
+        key = profile_key(prof)
+        if args.profile and key not in args.profile:
+            continue
+        if fixture(f"{key}_toc.html") is None or fixture(f"{key}_chapter.html") is None:
+            print(f"{key:<12} нет страниц в benchmarks/fixtures")
+            continue
+        r = crawl(prof, args.chapters, args.concurrency)
+        rate = r["chapters"] / r["seconds"]
+        results[f"{key}.chapters/s"] = round(rate, 2)
+        print(f"{key:<12} {r['chapters']:>5} {r['seconds']:>7.2f} {rate:>8.1f} {r['mb'] / r['seconds']:>7.1f}")
+    return 1 if report(results, args) else 0
+
+
+def mock_main(args) -> int:
+    results = {}
+    print(f"{'профиль':<12} {'глав':>5} {'сек':>7} {'глав/с':>8} {'429':>5}")
+    for key in MOCK_URL:
+        if args.profile and key not in args.profile:
+            continue
+        config = mock_site.MockConfig(chapters=args.chapters, latency=args.latency, jitter=args.latency / 2,
+                                      fail_429=args.fail_429, retry_after=0)
+        r = crawl_mock(key, args.chapters, args.concurrency, config)
+        rate = r["chapters"] / r["seconds"]
+        results[f"{key}.mock.chapters/s"] = round(rate, 2)
+        print(f"{key:<12} {r['chapters']:>5} {r['seconds']:>7.2f} {rate:>8.1f} {r['throttled']:>5}")
+    return 1 if report(results, args) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
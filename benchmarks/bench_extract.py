@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+bench_extract.py — разбор страницы главы: BeautifulSoup против lxml
+
+    python benchmarks/bench_extract.py [-n 20]
+
+Прогоняет extract_chapter каждого профиля на сохранённых страницах из
+benchmarks/fixtures/<профиль>_chapter*.html обоими движками, печатает
+среднее время и проверяет, что результаты совпадают. Страницы *_chapter_<случай>.html —
+крайние случаи разметки: реклама и скрипты между текстовыми узлами, <template>, комментарии.
+"""
+
+import argparse
+import sys
+
+from common import FIXTURES, profile_key, timed
+
+import site_profiles
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-n", "--repeat", type=int, default=20, help="повторов на страницу (берётся лучшее)")
+    args = ap.parse_args(argv)
+    if site_profiles.CSSSelector is None:
+        print("cssselect не установлен — движок lxml недоступен")
+        return 1
+
+    print(f"{'страница':<20} {'КБ':>6} {'bs4, мс':>9} {'lxml, мс':>9} {'ускор.':>7}  результат")
+    mismatches = 0
+    for prof in site_profiles.PROFILES:
+        key = profile_key(prof)
+        for path in sorted(FIXTURES.glob(f"{key}_chapter*.html")):
+            html = path.read_text(encoding="utf-8")
+            res, times = {}, {}
+            for name in ("bs4", "lxml"):
+                site_profiles.set_engine(name)
+                res[name] = prof.extract_chapter(html)
+                times[name] = timed(lambda: prof.extract_chapter(html), args.repeat)
+            same = res["bs4"] == res["lxml"]
+            mismatches += not same
+            label = key + path.stem[len(key) + len("_chapter"):]
+            print(f"{label:<20} {len(html.encode('utf-8')) // 1024:>6} {times['bs4'] * 1000:>9.2f} "
+                  f"{times['lxml'] * 1000:>9.2f} {times['bs4'] / times['lxml']:>6.1f}x  {'совпадает' if same else 'РАЗЛИЧАЕТСЯ'}")
+    site_profiles.set_engine("auto")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+bench_profiles.py — горячие пути каждого профиля на сохранённых страницах (без сети)
+
+    python benchmarks/bench_profiles.py [-n 10] [--json out.json] [--baseline base.json]
+
+Для каждого профиля из site_profiles.PROFILES берёт benchmarks/fixtures/<профиль>_toc.html
+и <профиль>_chapter.html и меряет (лучшее из n, мс):
+- toc       — parse_book на странице оглавления (страница отдаётся из файла вместо сети);
+- extract   — разбор страницы главы, как в fetch_chapter после загрузки;
+- normalize — normalize_whitespace на сыром тексте страницы;
+- docx      — save_chapter_docx извлечённой главы.
+Оглавление должно дать TOC_CHAPTERS глав — иначе профиль сломан (код возврата 1),
+как и при регрессии относительно --baseline.
+"""
+
+import argparse
+import contextlib
+import sys
+import tempfile
+from pathlib import Path
+
+from common import add_arguments, fixture, profile_key, report, timed_all
+
+import lxml.html
+import site_profiles
+from utils_docx import save_chapter_docx
+
+TOC_CHAPTERS = 600   # столько ссылок на главы в каждом *_toc.html
+# Адрес книги для parse_book: от него считаются относительные ссылки (а у RoyalRoad — и префикс глав)
+BOOK_URL = {
+    "royalroad": "https://www.royalroad.com/fiction/12345/the-wandering-inn-of-ash",
+    "mvlempyr": "https://www.mvlempyr.com/novel/martial-peak-eternal",
+    "novatls": "https://novatls.com/series/reincarnated-blacksmith/",
+    "ellotl": "https://www.ellotl.com/the-villainess-retires/",
+    "webnovel": "https://www.webnovel.com/book/library-of-heavens-path_7176992105000305",
+    "ranobelib": "https://ranobelib.me/ru/book/1234--lord-of-mysteries",
+    "fanqienovel": "https://fanqienovel.com/page/7100000000000000000",
+}
+
+
+class RecordedPage:
+    """Ответ с сохранённой страницей: то, что профили берут у requests.Response."""
+
+    def __init__(self, html: str):
+        self.text = html
+        self.content = html.encode("utf-8")
+        self.encoding = "utf-8"
+
+
+@contextlib.contextmanager
+def recorded(html: str):
+    """site_profiles.get отдаёт html на любой адрес — parse_book работает без сети."""
+    real = site_profiles.get
+    site_profiles.get = lambda url, **kw: RecordedPage(html)
+    try:
+        yield
+    finally:
+        site_profiles.get = real
+
+
+def parse_recorded(prof, url: str, toc: str):
+    with recorded(toc):
+        return prof.parse_book(url)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-n", "--repeat", type=int, default=10, help="повторов (берётся лучшее)")
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    cases, counts = {}, {}
+    tmp = tempfile.TemporaryDirectory()
+    for prof in site_profiles.PROFILES:
+        key = profile_key(prof)
+        toc, page = fixture(f"{key}_toc.html"), fixture(f"{key}_chapter.html")
+        if toc is None or page is None:
+            print(f"{key:<12} нет страниц в benchmarks/fixtures")
+            continue
+        url = BOOK_URL[key]
+        with recorded(toc):
+            counts[key] = len(prof.parse_book(url)[1])
+        title, text = prof.extract_chapter(page)
+        raw = lxml.html.fromstring(page).text_content()
+        folder = Path(tmp.name) / key
+        cases[f"{key}.toc"] = lambda prof=prof, url=url, toc=toc: parse_recorded(prof, url, toc)
+        cases[f"{key}.extract"] = lambda prof=prof, page=page: prof.extract_chapter(page)
+        cases[f"{key}.normalize"] = lambda raw=raw: site_profiles.normalize_whitespace(raw)
+        cases[f"{key}.docx"] = lambda folder=folder, title=title, text=text: save_chapter_docx(folder, title, text, 1)
+    with tmp:
+        results = {k: round(t * 1000, 3) for k, t in timed_all(cases, args.repeat).items()}
+
+    print(f"движок разбора: {site_profiles.engine()}\n")
+    print(f"{'профиль':<12} {'глав':>5} {'toc, мс':>8} {'extract':>8} {'normalize':>10} {'docx':>7}")
+    for key, n in counts.items():
+        flag = "" if n == TOC_CHAPTERS else f"  ОЖИДАЛОСЬ {TOC_CHAPTERS}"
+        print(f"{key:<12} {n:>5} {results[key + '.toc']:>8.2f} {results[key + '.extract']:>8.2f} "
+              f"{results[key + '.normalize']:>10.3f} {results[key + '.docx']:>7.2f}{flag}")
+    broken = sum(n != TOC_CHAPTERS for n in counts.values())
+    regressions = report(results, args)
+    return 1 if broken or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+bench_startup.py — время импорта app.py при холодном старте (python -X importtime)
+
+    python benchmarks/bench_startup.py [-n 5] [--top 15] [--module app]
+
+Запускает `python -X importtime -c "import app"` в отдельном процессе n раз,
+берёт лучший прогон и печатает самые дорогие модули верхнего уровня.
+Проверяет, что тяжёлые зависимости (requests, bs4, lxml, python-docx, SDK
+переводчиков) не грузятся при старте: они должны импортироваться при
+первом использовании. Код возврата 1, если какая-то из них попала в старт.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("requests", "bs4", "lxml", "docx", "google.generativeai",
+         "http_client", "site_profiles", "crawler", "book_export", "book_translate")
+
+Entry = Tuple[int, int, int, str]   # (глубина, собственное время мкс, накопленное мкс, модуль)
+
+
+def importtime(module: str) -> List[Entry]:
+    """Строки -X importtime одного холодного импорта module."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, int(self_us), int(cumulative), name.strip()))
+    return entries
+
+
+def top_level(entries: List[Entry], module: str) -> Dict[str, int]:
+    """Прямые импорты module (и сам module) с накопленным временем.
+
+    importtime печатает модуль после всех его импортов, так что поддерево module —
+    строки перед ним, пока глубина больше его собственной.
+    """
+    i = max(k for k, e in enumerate(entries) if e[3] == module)
+    depth = entries[i][0]
+    found = {module: entries[i][2]}
+    for d, _, cum, name in reversed(entries[:i]):
+        if d <= depth:
+            break
+        if d == depth + 1:
+            found[name] = cum
+    return found
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-n", "--repeat", type=int, default=5, help="прогонов (берётся лучший)")
+    ap.add_argument("--top", type=int, default=15, help="сколько модулей показать")
+    ap.add_argument("--module", default="app", help="что импортировать")
+    args = ap.parse_args(argv)
+
+    runs = [importtime(args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: next(e[2] for e in reversed(r) if e[3] == args.module))
+    mods = top_level(best, args.module)
+    total = mods.pop(args.module)
+
+    print(f"import {args.module}: {total / 1000:.1f} мс (лучший из {args.repeat})\n")
+    print(f"{'модуль':<32} {'мс':>8} {'доля':>6}")
+    for name, cum in sorted(mods.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<32} {cum / 1000:>8.1f} {cum / total:>6.0%}")
+
+    loaded = {e[3] for e in best}
+    heavy = [m for m in HEAVY if m in loaded]
+    print("\nтяжёлые модули при старте: " + (", ".join(heavy) if heavy else "нет"))
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+common.py — общее для бенчмарков: замер, имена профилей, сравнение с базовой линией
+
+Результаты сохраняются как {"<профиль>.<замер>": число}; --baseline сравнивает
+с прошлым прогоном и считает регрессией рост больше допуска (для времени)
+или падение больше допуска (для пропускной способности, ключи с суффиксом "/s").
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+NOISE_MS = 0.05   # разница меньше этого не считается регрессией — шум таймера
+
+
+def profile_key(prof) -> str:
+    return type(prof).__name__[:-len("Profile")].lower()
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """Лучшее время одного вызова fn из repeat, в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def timed_all(cases: Dict[str, Callable[[], object]], repeat: int) -> Dict[str, float]:
+    """Лучшее время каждого замера, в секундах; замеры идут по кругу.
+
+    На занятой машине медленные периоды длятся секундами; по кругу каждый замер
+    получает попытки из всего прогона, и лучшая из них не попадает в такой период.
+    """
+    best = {key: float("inf") for key in cases}
+    for _ in range(repeat):
+        for key, fn in cases.items():
+            t = time.perf_counter()
+            fn()
+            best[key] = min(best[key], time.perf_counter() - t)
+    return best
+
+
+def fixture(name: str) -> Optional[str]:
+    path = FIXTURES / name
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+def add_arguments(ap) -> None:
+    ap.add_argument("--json", type=Path, help="сохранить результаты в файл (базовая линия для --baseline)")
+    ap.add_argument("--baseline", type=Path, help="сравнить с сохранённым прогоном; код возврата 1 при регрессии")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="допустимое ухудшение, доля (по умолчанию 0.25)")
+
+
+def report(results: Dict[str, float], args) -> int:
+    """Пишет --json и сравнивает с --baseline; возвращает число регрессий."""
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+    if not args.baseline:
+        return 0
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = 0
+    print(f"\nсравнение с {args.baseline} (допуск {args.tolerance:.0%}):")
+    for key in sorted(results):
+        if key not in base:
+            continue
+        old, new = base[key], results[key]
+        if key.endswith("/s"):
+            worse = new < old * (1 - args.tolerance)
+        else:
+            worse = new > old * (1 + args.tolerance) and new - old > NOISE_MS
+        if worse:
+            regressions += 1
+            print(f"  РЕГРЕССИЯ {key}: {old:.2f} → {new:.2f}")
+    print(f"  регрессий: {regressions}")
+    return regressions
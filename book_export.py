@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+book_export.py — сборка книги в один файл: DOCX, EPUB или Markdown
+- порядок глав — по индексу оглавления (config.db), без журнала — по номеру в имени файла
+- текст оригинала берётся из chapter_texts, если он не старше DOCX; иначе DOCX разбирается заново
+- главы читаются и пишутся потоком: в памяти держится одна глава, а не вся книга
+- DOCX собирается тем же быстрым писателем, что и отдельные главы (utils_docx)
+- файл пишется во временный и переименовывается, недописанная книга не остаётся
+"""
+
+import os
+import re
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+from project_store import ProjectStore, ensure_dir
+from utils_docx import PAGE_BREAK_XML, chapter_xml, paragraph_xml, safe_name, temp_path, write_docx
+
+FORMATS = ("docx", "epub", "md")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_NUM = re.compile(r"(\d+)")
+
+Progress = Optional[Callable[[int, int, str], None]]
+
+
+# ---------- чтение глав ----------
+def chapter_files(folder: Path, store: Optional[ProjectStore] = None, project_id: Optional[int] = None) -> List[Path]:
+    """DOCX глав папки книги в порядке оглавления.
+
+    Индексы берутся из таблицы chapters (книга = имя папки); файлы, которых там нет,
+    сортируются по номеру в начале имени («012 Глава.docx»).
+    """
+    order = {}
+    if store is not None and project_id is not None:
+        order = {Path(path).name: idx for idx, _, _, path in store.book_chapters(project_id, folder.name)}
+
+    def key(p: Path):
+        if p.name in order:
+            return order[p.name], p.name
+        m = _NUM.match(p.name)
+        return (int(m.group(1)) if m else float("inf")), p.name
+
+    return sorted((p for p in folder.glob("*.docx") if not p.name.startswith("~$")), key=key)
+
+
+def read_chapter_docx(path: Path) -> Tuple[str, List[str]]:
+    """(заголовок, строки текста) главы; заголовок — первый абзац со стилем Heading/Title."""
+    title, lines = None, []
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        for _, el in iterparse(f):
+            if el.tag != _W + "p":
+                continue
+            parts, page_break = [], False
+            for node in el.iter():
+                if node.tag == _W + "t":
+                    parts.append(node.text or "")
+                elif node.tag == _W + "tab":
+                    parts.append("\t")
+                elif node.tag in (_W + "br", _W + "cr"):
+                    if node.get(_W + "type") == "page":
+                        page_break = True
+                    else:
+                        parts.append("\n")
+            style = el.find(f"{_W}pPr/{_W}pStyle")
+            text = "".join(parts)
+            if title is None and style is not None and style.get(_W + "val", "").startswith(("Heading", "Title")):
+                title = text.strip()
+            elif text or not page_break:
+                lines.append(text)
+            el.clear()
+    if title is None:
+        title = re.sub(r"^\d+\s*", "", path.stem)
+    return title, lines
+
+
+def stored_reader(store: ProjectStore, project_id: int, folder: Path) -> Callable[[Path], Tuple[str, List[str]]]:
+    """Читает главу из chapter_texts вместо DOCX, если текст там не старше файла."""
+    urls = {Path(path).name: url for _, url, _, path in store.book_chapters(project_id, folder.name)}
+
+    def read(path: Path) -> Tuple[str, List[str]]:
+        row = store.chapter_text(project_id, folder.name, urls[path.name]) if path.name in urls else None
+        if row:
+            stored = datetime.fromisoformat(row[2]).replace(tzinfo=timezone.utc).timestamp()
+            if stored >= path.stat().st_mtime:
+                return row[0], [line.strip() for line in row[1].split("\n")]
+        return read_chapter_docx(path)
+
+    return read
+
+
+def iter_chapters(files: List[Path], progress: Progress = None, read=read_chapter_docx) -> Iterator[Tuple[str, List[str]]]:
+    total = len(files)
+    for n, path in enumerate(files, start=1):
+        title, lines = read(path)
+        if progress:
+            progress(n, total, title)
+        yield title, lines
+
+
+# ---------- форматы ----------
+def _atomic(path: Path, write: Callable[[Path], None]) -> Path:
+    tmp = temp_path(path)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def export_docx(path: Path, book: str, chapters) -> Path:
+    def paragraphs():
+        yield paragraph_xml(book, heading=True, style="Title")
+        for title, lines in chapters:
+            yield PAGE_BREAK_XML
+            yield from chapter_xml(title, "\n".join(lines))
+
+    return write_docx(path, paragraphs())
+
+
+def export_md(path: Path, book: str, chapters) -> Path:
+    def write(tmp: Path):
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            f.write(f"# {book}\n")
+            for title, lines in chapters:
+                f.write(f"\n## {title}\n\n")
+                f.writelines(line.strip() + "\n\n" for line in lines if line.strip())
+
+    return _atomic(path, write)
+
+
+_CONTAINER = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+_XHTML = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="{lang}" lang="{lang}">
+<head><title>{title}</title></head>
+<body>
+{body}
+</body>
+</html>"""
+
+
+def export_epub(path: Path, book: str, chapters, lang: str = "ru") -> Path:
+    """EPUB 3 (с toc.ncx для старых читалок). Главы пишутся в архив по одной, оглавление — в конце."""
+    uid = f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, 'deepparser:' + book)}"
+    modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def write(tmp: Path):
+        toc = []
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            z.writestr("META-INF/container.xml", _CONTAINER)
+            for n, (title, lines) in enumerate(chapters, start=1):
+                name = f"ch{n:05d}.xhtml"
+                body = [f"<h2>{escape(title)}</h2>"] + [f"<p>{escape(line.strip())}</p>" for line in lines if line.strip()]
+                z.writestr(f"OEBPS/{name}", _XHTML.format(lang=lang, title=escape(title), body="\n".join(body)))
+                toc.append((name, title))
+
+            nav = "\n".join(f'<li><a href="{name}">{escape(title)}</a></li>' for name, title in toc)
+            z.writestr("OEBPS/nav.xhtml", _XHTML.format(
+                lang=lang, title=escape(book), body=f'<nav epub:type="toc" id="toc"><h1>{escape(book)}</h1>\n<ol>\n{nav}\n</ol></nav>'))
+            points = "\n".join(
+                f'<navPoint id="p{n}" playOrder="{n}"><navLabel><text>{escape(title)}</text></navLabel><content src="{name}"/></navPoint>'
+                for n, (name, title) in enumerate(toc, start=1))
+            z.writestr("OEBPS/toc.ncx", f"""<?xml version="1.0" encoding="UTF-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">
+<head><meta name="dtb:uid" content="{uid}"/></head>
+<docTitle><text>{escape(book)}</text></docTitle>
+<navMap>
+{points}
+</navMap>
+</ncx>""")
+            items = "\n".join(f'<item id="c{n}" href="{name}" media-type="application/xhtml+xml"/>' for n, (name, _) in enumerate(toc, start=1))
+            spine = "\n".join(f'<itemref idref="c{n}"/>' for n in range(1, len(toc) + 1))
+            z.writestr("OEBPS/content.opf", f"""<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid" xml:lang="{lang}">
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+<dc:identifier id="uid">{uid}</dc:identifier>
+<dc:title>{escape(book)}</dc:title>
+<dc:language>{lang}</dc:language>
+<meta property="dcterms:modified">{modified}</meta>
+</metadata>
+<manifest>
+<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+{items}
+</manifest>
+<spine toc="ncx">
+{spine}
+</spine>
+</package>""")
+
+    return _atomic(path, write)
+
+
+EXPORTERS = {"docx": export_docx, "epub": export_epub, "md": export_md}
+
+
+def export_book(folder: Path, fmt: str, out: Optional[Path] = None, store: Optional[ProjectStore] = None,
+                project_id: Optional[int] = None, progress: Progress = None) -> Path:
+    """Собирает главы из папки книги (<проект>/Original|Translation/<книга>) в один файл.
+
+    По умолчанию файл кладётся в <проект>/Export/<книга>.<fmt>; progress(n, total, title).
+    """
+    fmt = fmt.lower().lstrip(".")
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    folder = Path(folder)
+    files = chapter_files(folder, store, project_id)
+    if not files:
+        raise ValueError("В папке книги нет глав.")
+    book = folder.name
+    read = read_chapter_docx
+    if store is not None and project_id is not None and folder.parent.name == "Original":
+        read = stored_reader(store, project_id, folder)
+    if out is None:
+        suffix = " (перевод)" if folder.parent.name == "Translation" else ""
+        out = ensure_dir(folder.parent.parent / "Export") / f"{safe_name(book)}{suffix}.{fmt}"
+    return EXPORTERS[fmt](Path(out), book, iter_chapters(files, progress, read))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+book_translate.py — перевод книги целиком
+- главы проекта переводятся параллельно через интерфейс Translator
+- общий предел одновременных запросов и запросов в минуту (SETTINGS.json, секция translation)
+- результат — DOCX в <проект>/Translation/<книга> с теми же именами файлов, что и оригинал
+- готовые главы отмечаются в config.db (таблица translations): повторный запуск продолжает с места остановки,
+  а главы, чей оригинал изменился, переводятся заново
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from book_export import read_chapter_docx
+from project_store import ProjectStore, content_hash, ensure_dir
+from throttle import TokenBucket, backoff, load_section
+from translators import MemoryTranslator, TranslationCancelled, Translator, translate_chunked
+from utils_docx import chapter_xml, write_docx
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPM = 60
+RETRIES = 3
+
+
+def load_translation_config() -> dict:
+    """Секция translation файла SETTINGS.json (пустой dict, если файла нет)."""
+    return load_section("translation")
+
+
+def load_translation_settings() -> Tuple[int, int]:
+    """(concurrency, requests_per_minute) из секции translation файла SETTINGS.json."""
+    cfg = load_translation_config()
+    return int(cfg.get("concurrency") or DEFAULT_CONCURRENCY), int(cfg.get("requests_per_minute") or DEFAULT_RPM)
+
+
+def is_rate_limited(e: Exception) -> bool:
+    """429 / ResourceExhausted от API переводчика."""
+    return "429" in str(e) or "ResourceExhausted" in type(e).__name__ or "quota" in str(e).lower()
+
+
+class LimitedTranslator(Translator):
+    """Обёртка над переводчиком: не больше concurrency запросов сразу и rpm в минуту.
+
+    На ответ «слишком часто» скорость падает вдвое (как у сайтов в http_client) и запрос повторяется.
+    """
+
+    def __init__(self, inner: Translator, concurrency: int, rpm: int) -> None:
+        super().__init__(inner.api_key)
+        self.inner = inner
+        self.max_chunk_tokens = inner.max_chunk_tokens
+        self.concurrency = concurrency
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._bucket = TokenBucket(max(1, rpm) / 60.0, burst=max(1, concurrency))
+
+    def translate(self, text: str, **kwargs) -> str:
+        for attempt in range(RETRIES + 1):
+            self._bucket.acquire()
+            with self._slots:
+                try:
+                    result = self.inner.translate(text, **kwargs)
+                except Exception as e:
+                    if attempt == RETRIES or not is_rate_limited(e):
+                        raise
+                    self._bucket.penalize(backoff(attempt + 1))
+                    continue
+            self._bucket.reward()
+            return result
+
+
+@dataclass
+class BookTranslation:
+    target: Path
+    finished: bool
+    translated: int = 0
+    skipped: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (индекс главы, ошибка)
+
+
+def read_source(store: ProjectStore, project_id: int, book: str, url: str, path: str) -> Tuple[str, str]:
+    """(title, text) оригинала: из chapter_texts, иначе из DOCX."""
+    row = store.chapter_text(project_id, book, url)
+    if row:
+        return row[0], row[1]
+    title, lines = read_chapter_docx(Path(path))
+    return title, "\n".join(lines)
+
+
+def translate_book(
+    store: ProjectStore,
+    translator: Translator,
+    project_id: int,
+    book: str,
+    base: Path,
+    prompt: str = "",
+    glossary=None,
+    concurrency: Optional[int] = None,
+    rpm: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+) -> BookTranslation:
+    """Переводит все главы книги проекта в base/Translation/<книга>.
+
+    Уже переведённые главы с неизменённым оригиналом пропускаются. Ошибка одной главы
+    не останавливает книгу — она попадает в errors и будет переведена при следующем запуске.
+    progress(n, total, title) — после каждой обработанной главы.
+    """
+    conf_concurrency, conf_rpm = load_translation_settings()
+    if isinstance(translator, MemoryTranslator):
+        # Память переводов — перед лимитами: попадания в неё не тратят запросы
+        limited = translator.with_inner(LimitedTranslator(translator.inner, concurrency or conf_concurrency, rpm or conf_rpm))
+    else:
+        limited = LimitedTranslator(translator, concurrency or conf_concurrency, rpm or conf_rpm)
+    stop = stop or threading.Event()
+    target = ensure_dir(base / "Translation" / book)
+    chapters = store.book_chapters(project_id, book)
+    states = store.translation_states(project_id, book)
+    res = BookTranslation(target, False)
+
+    def work(idx: int, url: str, path: str) -> Tuple[bool, str]:
+        title, text = read_source(store, project_id, book, url, path)
+        h = content_hash(title, text)
+        out = target / Path(path).name
+        st = states.get(url)
+        if st and st[0] == h and Path(st[1]).exists():
+            return False, title
+        if stop.is_set():
+            raise TranslationCancelled()
+        # Заголовок идёт первой строкой первого куска — так он переводится в контексте главы
+        result = translate_chunked(limited, f"{title}\n{text}", cancel=stop, prompt=prompt, glossary=glossary).split("\n", 1)
+        tr_title, tr_text = result[0].strip() or title, result[1] if len(result) > 1 else ""
+        write_docx(out, chapter_xml(tr_title, tr_text))
+        store.record_translation(project_id, book, url, h, str(out))
+        return True, tr_title
+
+    total = len(chapters)
+    n = 0
+    with ThreadPoolExecutor(max_workers=max(1, limited.concurrency), thread_name_prefix="book-tr") as pool:
+        futures = {pool.submit(work, idx, url, path): idx for idx, url, _, path in chapters}
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            try:
+                done, title = fut.result()
+                if done: res.translated += 1
+                else: res.skipped += 1
+            except TranslationCancelled:
+                continue
+            except Exception as e:
+                res.errors.append((futures[fut], str(e)))
+                title = str(e)
+            n += 1
+            if progress:
+                progress(n, total, title)
+            if stop.is_set():
+                for f in futures:
+                    f.cancel()
+    res.errors.sort()
+    res.finished = not stop.is_set()
+    return res
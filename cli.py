@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+cli.py — парсер без GUI (сервер, cron)
+
+    python cli.py URL [URL ...] [-f urls.txt] [-o папка] [-w 8] [-b 3] [-e epub]
+
+Книги качаются параллельно (-b), а общее число одновременных запросов
+ко всем сайтам ограничено бюджетом воркеров (-w). Вежливые пределы и
+лимиты скорости каждого сайта берутся из его профиля. С -e каждая
+скачанная книга дополнительно собирается в один файл (папка Export).
+"""
+
+import argparse
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import BoundedSemaphore, Event, Lock
+from typing import List, Optional
+
+import http_client
+from book_export import FORMATS, export_book
+from crawler import ExportQueue, download_chapters
+from project_store import ensure_dir
+from site_profiles import detect_profile
+from utils_docx import save_chapter_docx
+
+_print_lock = Lock()
+
+
+def log(msg: str) -> None:
+    with _print_lock:
+        print(msg, flush=True)
+
+
+def crawl_book(url: str, outdir: Path, budget: BoundedSemaphore, stop: Event, export: List[str] = ()) -> Optional[Path]:
+    prof = detect_profile(url)
+    if not prof:
+        log(f"[skip] {url}: сайт не поддерживается")
+        return None
+    book, chapters = prof.parse_book(url)
+    if not chapters:
+        log(f"[skip] {url}: главы не найдены")
+        return None
+    target = ensure_dir(outdir / "Original" / book)
+    log(f"[book] {book}: {len(chapters)} глав → {target}")
+
+    writer = ExportQueue()
+
+    def save(i, ch, title, body, raw_hash):
+        writer.submit(save_chapter_docx, target, title or ch.title, body or "", i)
+
+    def progress(n, total, ch):
+        if n == total or n % 50 == 0:
+            log(f"[{book}] {n}/{total}")
+
+    try:
+        finished = download_chapters(prof, list(enumerate(chapters, start=1)), save,
+                                     stop=stop, progress=progress, budget=budget)
+    finally:
+        writer.close()
+    if finished:
+        for fmt in export:
+            log(f"[{book}] → {export_book(target, fmt)}")
+    return target
+
+
+def read_urls(args) -> List[str]:
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return urls
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Парсер веб-новелл без GUI")
+    ap.add_argument("urls", nargs="*", help="ссылки на книги")
+    ap.add_argument("-f", "--file", help="файл со ссылками, по одной в строке")
+    ap.add_argument("-o", "--out", default=".", help="рабочая папка (по умолчанию текущая)")
+    ap.add_argument("-w", "--workers", type=int, default=8, help="всего одновременных запросов")
+    ap.add_argument("-b", "--books", type=int, default=3, help="сколько книг качать параллельно")
+    ap.add_argument("--no-cache", action="store_true", help="не использовать кэш ответов")
+    ap.add_argument("-e", "--export", action="append", default=[], choices=FORMATS,
+                    help="собрать книгу в один файл (можно указать несколько раз)")
+    args = ap.parse_args(argv)
+
+    urls = read_urls(args)
+    if not urls:
+        ap.error("не указано ни одной ссылки")
+    outdir = ensure_dir(Path(args.out))
+    http_client.configure(proxies=http_client.load_proxies(), pool_size=max(args.workers, http_client.DEFAULT_POOL_SIZE))
+    if not args.no_cache:
+        http_client.use_cache(outdir / ".cache" / "http.db")
+
+    budget = BoundedSemaphore(max(1, args.workers))
+    stop = Event()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.books), thread_name_prefix="book") as pool:
+        futures = {pool.submit(crawl_book, u, outdir, budget, stop, args.export): u for u in urls}
+        try:
+            for fut, url in futures.items():
+                try:
+                    target = fut.result()
+                    if target:
+                        log(f"[done] {url}")
+                except Exception as e:
+                    failed += 1
+                    log(f"[fail] {url}: {e}")
+        except KeyboardInterrupt:
+            stop.set()
+            log("Остановка…")
+            return 130
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
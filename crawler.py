@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+crawler.py — параллельная загрузка глав
+- до N глав «в полёте» (N берётся из профиля сайта)
+- запись строго по порядку индексов
+- учёт событий паузы/стопа из UI
+- общий бюджет запросов на несколько книг сразу (семафор)
+- сеть в потоках, разбор HTML — в пуле процессов (не держит GIL рядом с Qt)
+- запись DOCX — отдельной стадией (ограниченная очередь + поток-писатель)
+- загрузка книги целиком с журналом в config.db (start_crawl / resume_crawl)
+"""
+
+import hashlib
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock, Semaphore, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from project_store import ProjectStore, content_hash, ensure_dir
+from http_client import decode_body
+from site_profiles import PROFILE_BY_NAME, BaseProfile, Chapter, engine, extract_page
+from utils_docx import save_chapter_docx
+
+# Разбор глав в отдельных процессах; False — разбирать в потоках загрузки
+PROCESS_EXTRACTION = True
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_lock = Lock()
+
+
+def extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """Общий пул процессов для разбора HTML (None на одноядерной машине или если выключен).
+
+    Пул создаётся при первой загрузке, когда уже работают потоки Qt, загрузки и записи,
+    поэтому процессы запускаются через spawn: fork() многопоточного процесса может
+    унести в дочерний захваченные чужими потоками блокировки и повиснуть на них.
+    """
+    global _extract_pool
+    if not PROCESS_EXTRACTION or (os.cpu_count() or 1) < 2:
+        return None
+    with _extract_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                               mp_context=multiprocessing.get_context("spawn"))
+        return _extract_pool
+
+
+def discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Убирает сломанный пул (умер процесс-разборщик): следующий extraction_pool() создаст новый."""
+    global _extract_pool
+    with _extract_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExportQueue:
+    """Фоновая стадия записи: задания выполняются по порядку в отдельном потоке.
+
+    Очередь ограничена, поэтому загрузка не убегает далеко вперёд диска.
+    Первая ошибка записи пробрасывается из submit() или close().
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self._q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._error: Optional[BaseException] = None
+        self._thread = Thread(target=self._run, name="export", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._q.get()
+            if job is None:
+                return
+            if self._error is None:
+                try:
+                    job[0](*job[1:])
+                except BaseException as e:
+                    self._error = e
+
+    def submit(self, fn: Callable, *args) -> None:
+        if self._error is not None:
+            raise self._error
+        self._q.put((fn, *args))
+
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def close(self) -> None:
+        """Дожидается записи всего, что уже поставлено в очередь."""
+        self._q.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+class ChapterError(Exception):
+    """Ошибка загрузки конкретной главы; исходное исключение — в __cause__."""
+
+    def __init__(self, index: int, chapter: Chapter, cause: Exception):
+        super().__init__(f"Глава {index} ({chapter.title}): {cause}")
+        self.index = index
+        self.chapter = chapter
+
+
+def wait_if_paused(pause: Optional[Event], stop: Optional[Event]) -> bool:
+    """Блокирует, пока стоит пауза. Возвращает False, если пришёл стоп."""
+    while pause is not None and pause.is_set():
+        if stop is not None and stop.is_set():
+            break
+        time.sleep(0.2)
+    return not (stop is not None and stop.is_set())
+
+
+def download_chapters(
+    prof: BaseProfile,
+    chapters: List[Tuple[int, Chapter]],
+    save: Callable[[int, Chapter, str, str, str], None],
+    pause: Optional[Event] = None,
+    stop: Optional[Event] = None,
+    progress: Optional[Callable[[int, int, Chapter], None]] = None,
+    concurrency: Optional[int] = None,
+    budget: Optional[Semaphore] = None,
+) -> bool:
+    """Скачивает главы пулом потоков и передаёт их в save(i, ch, title, body, raw_hash) по порядку.
+
+    chapters — пары (индекс главы, Chapter); индекс уходит в save() как номер файла,
+    raw_hash — sha1 сырой страницы (видно, менялась ли глава на сайте).
+    progress(n, total, ch) вызывается перед ожиданием n-й по счёту главы.
+    budget — общий на несколько загрузок семафор: каждый запрос занимает одно место.
+    Возвращает True, если все главы обработаны, и False при остановке.
+    """
+    total = len(chapters)
+    workers = max(1, concurrency or prof.concurrency)
+    name = type(prof).__name__
+    in_procs = name in PROFILE_BY_NAME
+    parser = engine()   # set_engine действует только в этом процессе — в пул движок передаётся явно
+
+    def extract(raw):
+        """(пул, Future) из пула процессов или (None, (заголовок, текст)); сломанный пул — разбор здесь же."""
+        procs = extraction_pool() if in_procs else None
+        if procs is not None:
+            try:
+                return procs, procs.submit(extract_page, name, *raw, parser)
+            except BrokenProcessPool:
+                discard_pool(procs)
+        return None, prof.extract_chapter(decode_body(*raw))
+
+    def fetch(url):
+        # Поток загрузки только качает; разбор уходит в пул процессов и ждётся уже по порядку глав
+        if budget is not None:
+            budget.acquire()
+        try:
+            raw = prof.fetch_raw(url)
+        finally:
+            if budget is not None:
+                budget.release()
+        return (*extract(raw), raw, hashlib.sha1(raw[0]).hexdigest())
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+    pending = {}
+    next_submit = 0
+    try:
+        for pos, (i, ch) in enumerate(chapters):
+            # Держим окно из `workers` запросов впереди текущей главы
+            while next_submit < total and next_submit < pos + workers:
+                if not wait_if_paused(pause, stop):
+                    return False
+                pending[next_submit] = pool.submit(fetch, chapters[next_submit][1].url)
+                next_submit += 1
+            if not wait_if_paused(pause, stop):
+                return False
+
+            if progress:
+                progress(pos + 1, total, ch)
+            try:
+                procs, res, raw, raw_hash = pending.pop(pos).result()
+                if procs is not None:
+                    try:
+                        res = res.result()
+                    except BrokenProcessPool:
+                        # Процесс-разборщик умер (OOM, kill): пул пересоздаётся, эта глава разбирается здесь
+                        discard_pool(procs)
+                        res = prof.extract_chapter(decode_body(*raw))
+                title, body = res
+            except Exception as e:
+                raise ChapterError(i, ch, e) from e
+            save(i, ch, title, body, raw_hash)
+        return True
+    finally:
+        for fut in pending.values():
+            fut.cancel()
+        pool.shutdown(wait=False)
+
+
+@dataclass
+class CrawlResult:
+    crawl_id: Optional[int]
+    target: Path
+    finished: bool
+    count: int  # сколько глав было поставлено в загрузку
+
+
+def start_crawl(
+    store: ProjectStore,
+    prof: BaseProfile,
+    url: str,
+    base: Path,
+    project_id: Optional[int] = None,
+    only_new: bool = False,
+    on_journal: Optional[Callable[[int], None]] = None,
+    **kw,
+) -> CrawlResult:
+    """Разбирает оглавление, заводит журнал и качает главы в base/Original/<книга>.
+
+    only_new — пропускать главы, уже записанные в config.db под тем же номером и заголовком.
+    on_journal(crawl_id) вызывается сразу после создания журнала.
+    RuntimeError, если эта книга проекта уже качается в этом процессе.
+    Остальные аргументы (pause, stop, progress, budget) уходят в download_chapters.
+    """
+    # Книгу уже качает задание очереди или GUI — вторая загрузка скачала бы те же главы параллельно
+    if store.crawl_active(project_id, url):
+        raise RuntimeError("Эта книга уже загружается.")
+    book, chapters = prof.parse_book(url)
+    if not chapters:
+        raise ValueError("Не удалось найти главы.")
+    target = ensure_dir(base / "Original" / book)
+    known = store.chapter_states(project_id, book) if project_id is not None else {}
+
+    todo = []
+    for i, ch in enumerate(chapters, start=1):
+        st = known.get(ch.url)
+        if only_new and st and st[0] == i and st[1] == ch.title and Path(st[3]).exists():
+            continue
+        todo.append((i, ch))
+    if not todo:
+        return CrawlResult(None, target, True, 0)
+
+    cid = store.start_crawl(project_id, url, book, str(target), [(i, ch.title, ch.url) for i, ch in todo])
+    if on_journal:
+        on_journal(cid)
+    finished = _journaled_download(store, prof, cid, project_id, book, target, todo, known, **kw)
+    return CrawlResult(cid, target, finished, len(todo))
+
+
+def resume_crawl(store: ProjectStore, prof: BaseProfile, crawl_id: int,
+                 project_id: Optional[int] = None, **kw) -> CrawlResult:
+    """Докачивает главы журнала crawl_id, которые ещё не скачаны (оглавление заново не разбирается).
+
+    RuntimeError, если этот журнал уже качается в этом процессе.
+    """
+    _, _, book, target = store.crawl_info(crawl_id)
+    target = ensure_dir(Path(target))
+    todo = [(i, Chapter(title, u)) for i, title, u in store.crawl_pending(crawl_id)]
+    known = store.chapter_states(project_id, book) if project_id is not None else {}
+    # Тот же журнал может качать задание очереди — второй загрузчик скачал бы главы дважды
+    if not store.claim_crawl(crawl_id):
+        raise RuntimeError("Эта загрузка уже идёт.")
+    finished = _journaled_download(store, prof, crawl_id, project_id, book, target, todo, known, **kw)
+    return CrawlResult(crawl_id, target, finished, len(todo))
+
+
+def _journaled_download(store: ProjectStore, prof: BaseProfile, cid: int, project_id: Optional[int],
+                        book: str, target: Path, todo: List[Tuple[int, Chapter]],
+                        known: Dict[str, Tuple[int, str, str, str]], **kw) -> bool:
+    # batch и запись в config.db живут только в потоке ExportQueue: глава попадает в журнал после записи файла
+    batch, texts = [], []
+
+    def flush():
+        if batch:
+            store.record_chapters(project_id, book, batch, crawl_id=cid, texts=texts)
+            batch.clear(); texts.clear()
+
+    def write(i, ch, title, body, raw_hash):
+        h = content_hash(title, body)
+        st = known.get(ch.url)
+        # Текст не изменился и файл на месте — DOCX не переписываем
+        if st and st[0] == i and st[2] == h and Path(st[3]).exists():
+            path = st[3]
+        else:
+            path = str(save_chapter_docx(target, title, body, index=i))
+        batch.append((ch.url, i, ch.title, h, path))
+        texts.append((ch.url, i, title, raw_hash, body))
+        if len(batch) >= 20:
+            flush()
+
+    def save(i, ch, title, body, raw_hash):
+        export.submit(write, i, ch, title or ch.title, body or "", raw_hash)
+
+    export = ExportQueue()
+    # Журнал закрывается всегда: иначе он так и останется 'running' (и занятым в store)
+    status = "failed"
+    try:
+        try:
+            finished = download_chapters(prof, todo, save, **kw)
+        except ChapterError as e:
+            store.fail_crawl_chapter(cid, e.index, str(e.__cause__))
+            raise
+        finally:
+            # Дописать уже скачанное; submit() бросает сохранённую ошибку записи, но close() нужен всё равно
+            try:
+                export.submit(flush)
+            finally:
+                export.close()
+        status = "done" if finished else "stopped"
+    finally:
+        store.finish_crawl(cid, status)
+    return finished
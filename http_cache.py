@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+http_cache.py — постоянный кэш HTTP-ответов в папке проекта
+- SQLite: записи по URL + тела по sha256 (одинаковые страницы хранятся один раз)
+- условные запросы по ETag / Last-Modified, ответ 304 отдаёт тело из кэша
+- свежие записи (моложе max_age) отдаются вовсе без сети
+- ограничение размера с вытеснением давно не использованных (LRU)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 600  # секунд: перезапуск после сбоя и отладка селекторов идут без сети
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    headers: Dict[str, str]
+    encoding: Optional[str]
+    stored_at: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        h: Dict[str, str] = {}
+        if self.headers.get("ETag"):
+            h["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            h["If-Modified-Since"] = self.headers["Last-Modified"]
+        return h
+
+    def to_response(self) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.url = self.url
+        r._content = self.body
+        r.headers = CaseInsensitiveDict(self.headers)
+        r.encoding = self.encoding
+        return r
+
+
+class ResponseCache:
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        cur = self._conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("""CREATE TABLE IF NOT EXISTS blobs(
+            hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS entries(
+            url TEXT PRIMARY KEY,
+            hash TEXT NOT NULL,
+            headers TEXT NOT NULL,
+            encoding TEXT,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );""")
+        cur.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS entries_hash ON entries(hash)")
+        self._conn.commit()
+        self._total = cur.execute("SELECT COALESCE(SUM(size),0) FROM blobs").fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.headers,e.encoding,e.stored_at,b.data FROM entries e JOIN blobs b ON b.hash=e.hash WHERE e.url=?",
+                (url,)).fetchone()
+        if not row:
+            return None
+        return CachedResponse(url, zlib.decompress(row[3]), json.loads(row[0]), row[1], row[2])
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.stored_at < self.max_age
+
+    def touch(self, url: str, revalidated: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._conn.execute("UPDATE entries SET accessed_at=?, stored_at=? WHERE url=?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE entries SET accessed_at=? WHERE url=?", (now, url))
+            self._conn.commit()
+
+    def store(self, url: str, resp: requests.Response) -> None:
+        body = resp.content
+        digest = hashlib.sha256(body).hexdigest()
+        headers = {k: resp.headers[k] for k in KEEP_HEADERS if k in resp.headers}
+        now = time.time()
+        with self._lock:
+            cur = self._conn.cursor()
+            old = cur.execute("SELECT hash FROM entries WHERE url=?", (url,)).fetchone()
+            if not cur.execute("SELECT 1 FROM blobs WHERE hash=?", (digest,)).fetchone():
+                data = zlib.compress(body)
+                cur.execute("INSERT INTO blobs(hash,data,size) VALUES(?,?,?)", (digest, data, len(data)))
+                self._total += len(data)
+            cur.execute("INSERT OR REPLACE INTO entries(url,hash,headers,encoding,stored_at,accessed_at) VALUES(?,?,?,?,?,?)",
+                        (url, digest, json.dumps(headers), resp.encoding, now, now))
+            if old and old[0] != digest:
+                self._release(cur, [old[0]])
+            if self._total > self.max_bytes:
+                self._evict(cur)
+            self._conn.commit()
+
+    def _release(self, cur, hashes) -> None:
+        """Удаляет тела, на которые больше не ссылается ни один URL."""
+        for h in set(hashes):
+            if cur.execute("SELECT 1 FROM entries WHERE hash=? LIMIT 1", (h,)).fetchone():
+                continue
+            row = cur.execute("SELECT size FROM blobs WHERE hash=?", (h,)).fetchone()
+            if row:
+                cur.execute("DELETE FROM blobs WHERE hash=?", (h,))
+                self._total -= row[0]
+
+    def _evict(self, cur) -> None:
+        # Срезаем до 90% лимита, чтобы не вытеснять на каждой записи
+        # Читаем по 64 самых старых записи, а удаляем по одной: пачкой целиком ушли бы и свежие
+        target = self.max_bytes * 0.9
+        while self._total > target:
+            rows = cur.execute("SELECT url,hash FROM entries ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                break
+            for url, h in rows:
+                cur.execute("DELETE FROM entries WHERE url=?", (url,))
+                self._release(cur, [h])
+                if self._total <= target:
+                    break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM blobs")
+            self._conn.commit()
+            self._total = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
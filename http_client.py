@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+http_client.py — общий HTTP-слой для профилей сайтов
+- одна requests.Session на хост: keep-alive и пул соединений
+- сжатие ответа (gzip/deflate, br/zstd если установлены)
+- прокси из SETTINGS.json → network применяются к сессиям, а не к окружению
+- token bucket на домен с адаптивным замедлением на 429/503 и Retry-After
+- повторы с джиттером для временных ошибок
+- необязательный кэш ответов (http_cache.ResponseCache) с условными запросами
+"""
+
+import email.utils
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from http_cache import ResponseCache
+from throttle import BACKOFF_BASE, TokenBucket, backoff, load_section
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RATE = 2.0          # запросов в секунду для незарегистрированных хостов
+DEFAULT_RETRIES = 3
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def load_proxies() -> Dict[str, str]:
+    """Прокси из секции network файла SETTINGS.json: {"http": ..., "https": ...} (пустые не попадают)."""
+    net = load_section("network")
+    return {scheme: net[f"{scheme}_proxy"] for scheme in ("http", "https") if net.get(f"{scheme}_proxy")}
+
+
+class SessionPool:
+    """Держит по одной Session на хост, чтобы не платить TCP/TLS рукопожатие за каждую главу."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, proxies: Optional[Dict[str, str]] = None):
+        self.pool_size = pool_size
+        self.proxies: Dict[str, str] = dict(proxies or {})
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _make_session(self) -> requests.Session:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        s.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+        if self.proxies:
+            # Иначе HTTP(S)_PROXY/NO_PROXY из окружения перекрыли бы прокси из SETTINGS.json
+            s.trust_env = False
+            s.proxies.update(self.proxies)
+        return s
+
+    def session(self, url: str) -> requests.Session:
+        host = urllib.parse.urlparse(url).netloc.lower()
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = self._sessions[host] = self._make_session()
+            return s
+
+    def configure(self, proxies: Optional[Dict[str, str]] = None, pool_size: Optional[int] = None) -> None:
+        """Меняет прокси/размер пула; открытые сессии закрываются и создаются заново."""
+        with self._lock:
+            if proxies is not None:
+                self.proxies = dict(proxies)
+            if pool_size is not None:
+                self.pool_size = pool_size
+            sessions, self._sessions = self._sessions, {}
+        for s in sessions.values():
+            s.close()
+
+    def close(self) -> None:
+        self.configure()
+
+
+class RateLimiter:
+    """Сопоставляет хост с bucket'ом; домены регистрируют профили сайтов (BaseProfile.domains)."""
+
+    def __init__(self, default_rate: float = DEFAULT_RATE):
+        self.default_rate = default_rate
+        self._domains: Dict[Tuple[str, ...], TokenBucket] = {}
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def register(self, domains: Iterable[str], rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self._domains[tuple(domains)] = TokenBucket(rate, burst)
+            self._hosts.clear()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urllib.parse.urlparse(url).netloc.lower()
+        with self._lock:
+            b = self._hosts.get(host)
+            if b is None:
+                b = next((tb for ds, tb in self._domains.items() if any(d in host for d in ds)), None)
+                b = self._hosts[host] = b or TokenBucket(self.default_rate)
+            return b
+
+
+def retry_after(resp: requests.Response) -> Optional[float]:
+    """Секунды из заголовка Retry-After (число или HTTP-дата)."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+_pool = SessionPool()
+limiter = RateLimiter()
+cache: Optional[ResponseCache] = None
+
+
+def configure(proxies: Optional[Dict[str, str]] = None, pool_size: Optional[int] = None) -> None:
+    _pool.configure(proxies=proxies, pool_size=pool_size)
+
+
+def use_cache(path: Optional[Path]) -> None:
+    """Подключает кэш ответов в файле path (None — отключить)."""
+    global cache
+    if cache is not None and path is not None and cache.path == Path(path):
+        return
+    old, cache = cache, (ResponseCache(path) if path is not None else None)
+    if old is not None:
+        old.close()
+
+
+def get(url: str, retries: int = DEFAULT_RETRIES, revalidate: bool = False, **kw) -> requests.Response:
+    """GET через пул, лимитер и кэш. revalidate=True — не отдавать свежую запись без запроса (оглавления)."""
+    store = cache
+    cached = store.lookup(url) if store is not None else None
+    if cached is not None:
+        if not revalidate and store.is_fresh(cached):
+            store.touch(url)
+            return cached.to_response()
+        kw["headers"] = {**kw.get("headers", {}), **cached.conditional_headers()}
+    resp = fetch(url, retries=retries, **kw)
+    if cached is not None and resp.status_code == 304:
+        store.touch(url, revalidated=True)
+        return cached.to_response()
+    if store is not None and resp.status_code == 200:
+        store.store(url, resp)
+    return resp
+
+
+def decode_body(content: bytes, encoding: Optional[str]) -> str:
+    """Текст страницы так же, как Response.text (кодировка из заголовков или угаданная)."""
+    r = requests.Response()
+    r._content = content
+    r.encoding = encoding
+    return r.text
+
+
+def fetch(url: str, retries: int = DEFAULT_RETRIES, **kw) -> requests.Response:
+    """Запрос мимо кэша: лимит домена, повторы и адаптивное замедление."""
+    kw.setdefault("timeout", DEFAULT_TIMEOUT)
+    bucket = limiter.bucket(url)
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            resp = _pool.session(url).get(url, **kw)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            time.sleep(backoff(attempt))
+            attempt += 1
+            continue
+        if resp.status_code in THROTTLE_STATUSES:
+            delay = retry_after(resp)
+            bucket.penalize(delay if delay is not None else max(BACKOFF_BASE, backoff(attempt)))
+        elif resp.status_code < 400:
+            bucket.reward()
+        if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+            return resp
+        if resp.status_code not in THROTTLE_STATUSES:
+            time.sleep(backoff(attempt))
+        attempt += 1
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+jobs.py — очередь книг и общий планировщик загрузки
+- задания хранятся в config.db (таблица jobs) и переживают перезапуск
+- книги с разных сайтов качаются параллельно, с одного сайта — по очереди
+- все задания делят общий пул HTTP-сессий и лимиты доменов из http_client
+- пауза задания останавливает его загрузку; продолжение идёт по журналу (докачка)
+"""
+
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from project_store import ProjectStore
+
+DEFAULT_MAX_BOOKS = 3
+
+
+class Scheduler:
+    def __init__(
+        self,
+        store: ProjectStore,
+        max_books: int = DEFAULT_MAX_BOOKS,
+        on_change: Optional[Callable[[], None]] = None,
+        on_progress: Optional[Callable[[int, int, int], None]] = None,
+    ):
+        """on_change() — изменился состав/статус очереди; on_progress(job_id, n, total)."""
+        self.store = store
+        self.max_books = max_books
+        self.on_change = on_change or (lambda: None)
+        self.on_progress = on_progress or (lambda job_id, n, total: None)
+        self._cond = threading.Condition()
+        self._running: Dict[int, Tuple[Tuple[str, ...], threading.Event]] = {}
+        self._pausing = set()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- управление ----------
+    def start(self) -> None:
+        self.store.requeue_running_jobs()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Останавливает загрузки; незаконченные задания останутся в очереди до следующего запуска."""
+        with self._cond:
+            self._closed = True
+            for _, stop in self._running.values():
+                stop.set()
+            self._cond.notify_all()
+
+    def add(self, url: str, project_id: Optional[int], base: Path, only_new: bool = False, priority: int = 0) -> int:
+        jid = self.store.add_job(url, project_id, str(base), only_new, priority)
+        self._changed()
+        return jid
+
+    def pause(self, job_id: int) -> None:
+        with self._cond:
+            if job_id in self._running:
+                self._pausing.add(job_id)
+                self._running[job_id][1].set()
+                return
+        self.store.update_job(job_id, status="paused")
+        self._changed()
+
+    def resume(self, job_id: int) -> None:
+        self.store.update_job(job_id, status="queued", error=None)
+        self._changed()
+
+    def remove(self, job_id: int) -> None:
+        with self._cond:
+            if job_id in self._running:
+                self._running[job_id][1].set()
+        self.store.remove_job(job_id)
+        self._changed()
+
+    def move(self, job_id: int, delta: int) -> None:
+        self.store.move_job(job_id, delta)
+        self._changed()
+
+    def set_priority(self, job_id: int, priority: int) -> None:
+        self.store.update_job(job_id, priority=priority)
+        self._changed()
+
+    def is_downloading(self, url: str, project_id: Optional[int]) -> bool:
+        """Качает ли очередь сейчас эту книгу проекта (в том числе ещё разбирая оглавление)."""
+        return any(job[1] == url and job[2] == project_id for job in self.store.list_jobs("running"))
+
+    def _changed(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+        self.on_change()
+
+    # ---------- планировщик ----------
+    def _loop(self) -> None:
+        with self._cond:
+            while not self._closed:
+                self._dispatch()
+                self._cond.wait(timeout=5)
+
+    def _dispatch(self) -> None:
+        """Запускает задания по порядку очереди, не больше одного на сайт. Вызывается под _cond."""
+        jobs = self.store.list_jobs("queued")
+        if not jobs:
+            return
+        from site_profiles import detect_profile   # парсер (bs4, lxml, requests) грузится с первым заданием
+        busy = {dom for dom, _ in self._running.values()}
+        for job in jobs:
+            if len(self._running) >= self.max_books:
+                break
+            jid, url = job[0], job[1]
+            prof = detect_profile(url)
+            if not prof:
+                self.store.update_job(jid, status="failed", error="Сайт не поддерживается")
+                self.on_change()
+                continue
+            dom = tuple(prof.domains)
+            if dom in busy or self.store.crawl_active(job[2], url):   # книгу качает GUI — ждём
+                continue
+            busy.add(dom)
+            stop = threading.Event()
+            self._running[jid] = (dom, stop)
+            self.store.update_job(jid, status="running", error=None)
+            threading.Thread(target=self._run, args=(job, prof, stop), name=f"job-{jid}", daemon=True).start()
+            self.on_change()
+
+    def _run(self, job, prof, stop: threading.Event) -> None:
+        from crawler import resume_crawl, start_crawl
+        jid, url, pid, base, only_new, _, _, _, crawl_id, _ = job
+        kw = dict(stop=stop, progress=lambda n, total, ch: self.on_progress(jid, n, total))
+        status, error = "failed", None
+        try:
+            if crawl_id and self.store.crawl_pending(crawl_id):
+                res = resume_crawl(self.store, prof, crawl_id, pid, **kw)
+            elif crawl_id and self.store.crawl_status(crawl_id) == "done":
+                res = None   # журнал задания докачали через «Докачать», пока оно стояло на паузе
+            else:
+                res = start_crawl(self.store, prof, url, Path(base), pid, bool(only_new),
+                                  on_journal=lambda cid: self.store.update_job(jid, crawl_id=cid), **kw)
+            status = "done" if res is None or res.finished else "stopped"
+        except Exception as e:
+            error = str(e)
+        with self._cond:
+            self._running.pop(jid, None)
+            if status == "stopped":
+                status = "paused" if jid in self._pausing else "queued"
+            self._pausing.discard(jid)
+            if self.store.get_job(jid):
+                self.store.update_job(jid, status=status, error=error)
+            self._cond.notify_all()
+        self.on_change()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+mock_site.py — локальный сайт-новелла для нагрузочных тестов (без настоящих сайтов)
+
+    python mock_site.py [--port 8765] [--chapters 500] [--page-kb 20] [--latency 50] [--jitter 20]
+                        [--fail-429 0.05] [--max-rps 10] [--retry-after 1]
+
+- синтетические оглавления и главы в разметке RoyalRoad (/fiction/<id>/<slug>) и Webnovel (/book/<slug>_<id>)
+- настраиваются число глав, размер страницы главы, задержка ответа и ответы 429 (доля случайных и сверх --max-rps)
+- ETag и 304 на условные запросы — как у настоящих сайтов, кэш http_client работает
+- работает и как HTTP-прокси: с network.http_proxy = "http://127.0.0.1:8765" в SETTINGS.json адреса
+  http://www.royalroad.com/fiction/1/mock и http://www.webnovel.com/book/mock_1 попадают сюда,
+  профили site_profiles узнают сайт по домену, а лимиты берутся из профиля — как в GUI и cli.py
+- /v1/chat/completions — заглушка OpenAI-совместимого API для бэкенда перевода local (в т.ч. stream)
+- /__stats — счётчики запросов в JSON
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+WORDS = ("the of and a to in he was his that it with as for on had at by her she they "
+         "sword sect elder cultivation dragon heaven qi realm master disciple spirit beast "
+         "inn road night city guild mana dungeon level quest").split()
+
+
+@dataclass
+class MockConfig:
+    chapters: int = 500
+    page_kb: int = 20           # примерный размер текста главы
+    latency: float = 0.0        # задержка ответа, мс
+    jitter: float = 0.0         # + случайно до стольких мс
+    fail_429: float = 0.0       # доля ответов 429 вне зависимости от нагрузки
+    max_rps: float = 0.0        # больше запросов в секунду — 429 (0 — без предела)
+    retry_after: int = 1        # значение заголовка Retry-After в ответе 429
+    seed: int = 1
+
+
+def paragraphs(n: int, size: int):
+    rng = random.Random(n)
+    out, total = [], 0
+    while total < size:
+        p = " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 90))).capitalize() + "."
+        out.append(p)
+        total += len(p)
+    return out
+
+
+def page(title: str, body: str) -> str:
+    nav = "".join(f'<li><a href="/c{i}">Category {i}</a></li>' for i in range(20))
+    return ('<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+            f'<title>{title}</title><script src="/js/app.js"></script></head><body>'
+            f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>\n{body}\n'
+            '<footer><p>&copy; mock</p></footer></body></html>')
+
+
+@lru_cache(maxsize=8)
+def toc_page(shape: str, base: str, chapters: int) -> bytes:
+    if shape == "royalroad":
+        rows = "".join(f'<tr><td><a href="{base}/chapter/{n}/chapter-{n}">Chapter {n}</a></td></tr>\n'
+                       for n in range(1, chapters + 1))
+        body = f'<h1 class="fiction-title">Mock Fiction</h1><table id="chapters"><tbody>\n{rows}</tbody></table>'
+    else:
+        rows = "".join(f'<li><a href="{base}/chapter-{n}_{n}">Chapter {n}</a></li>\n' for n in range(1, chapters + 1))
+        body = f'<h1>Mock Book</h1><ol class="content-list">\n{rows}</ol>'
+    return page("Mock", body).encode("utf-8")
+
+
+@lru_cache(maxsize=1024)
+def chapter_page(shape: str, n: int, size: int) -> bytes:
+    text = "".join(f"<p>{p}</p>\n" for p in paragraphs(n, size))
+    ads = '<ins class="adsbygoogle"></ins><script>ads()</script>'
+    if shape == "royalroad":
+        body = (f'<h1 class="chapter-title">Chapter {n}</h1>'
+                f'<div class="chapter-inner chapter-content">{ads}\n{text}</div>')
+    else:
+        body = f'<div class="cha-tit"><h1>Chapter {n}</h1></div><div id="chapter-content" class="cha-words">{ads}\n{text}</div>'
+    return page(f"Chapter {n}", body).encode("utf-8")
+
+
+def route(path: str) -> Optional[Tuple[str, str, Optional[int]]]:
+    """(шаблон сайта, адрес книги, номер главы или None для оглавления); None — нет такой страницы."""
+    parts = path.strip("/").split("/")
+    if len(parts) >= 3 and parts[0] == "fiction":
+        base = "/" + "/".join(parts[:3])
+        if len(parts) >= 5 and parts[3] == "chapter" and parts[4].isdigit():
+            return "royalroad", base, int(parts[4])
+        return ("royalroad", base, None) if len(parts) == 3 else None
+    if len(parts) >= 2 and parts[0] == "book":
+        base = "/" + "/".join(parts[:2])
+        if len(parts) == 2:
+            return "webnovel", base, None
+        if len(parts) == 3 and parts[2].startswith("chapter-"):
+            num = parts[2][len("chapter-"):].split("_")[0]
+            return ("webnovel", base, int(num)) if num.isdigit() else None
+    return None
+
+
+class MockSite(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: MockConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), MockHandler)
+        self.config = config
+        self.stats: Dict[str, int] = {"requests": 0, "toc": 0, "chapters": 0, "not_modified": 0,
+                                      "throttled": 0, "completions": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        self._window = (0, 0)   # (секунда, запросов в ней) для --max-rps
+
+    @property
+    def base(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def admit(self) -> Tuple[float, bool]:
+        """(задержка, ответить ли 429) для очередного запроса."""
+        cfg = self.config
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = (cfg.latency + self._rng.uniform(0, cfg.jitter)) / 1000.0
+            throttle = self._rng.random() < cfg.fail_429
+            if cfg.max_rps:
+                sec = int(time.monotonic())
+                count = self._window[1] + 1 if self._window[0] == sec else 1
+                self._window = (sec, count)
+                throttle = throttle or count > cfg.max_rps
+            if throttle:
+                self.stats["throttled"] += 1
+        return delay, throttle
+
+    def start(self) -> "MockSite":
+        threading.Thread(target=self.serve_forever, name="mock-site", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockSite
+
+    def do_GET(self):
+        # В режиме прокси приходит полный адрес: http://www.royalroad.com/fiction/...
+        path = urllib.parse.urlparse(self.path).path
+        if path == "/__stats":
+            return self._send(200, json.dumps({**self.server.stats, "config": asdict(self.server.config)}).encode(),
+                              "application/json")
+        delay, throttle = self.server.admit()
+        if delay:
+            time.sleep(delay)
+        if throttle:
+            return self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": str(self.server.config.retry_after)})
+        found = route(path)
+        if found is None:
+            return self._send(404, b"Not Found", "text/plain")
+        shape, base, n = found
+        cfg = self.server.config
+        if n is None:
+            body = toc_page(shape, base, cfg.chapters)
+            self.server.count("toc")
+        elif 1 <= n <= cfg.chapters:
+            body = chapter_page(shape, n, cfg.page_kb * 1024)
+            self.server.count("chapters")
+        else:
+            return self._send(404, b"Not Found", "text/plain")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.count("not_modified")
+            return self._send(304, b"", None, {"ETag": etag})
+        self._send(200, body, "text/html; charset=utf-8", {"ETag": etag})
+
+    def do_POST(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, b"Not Found", "text/plain")
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        delay, throttle = self.server.admit()
+        if delay:
+            time.sleep(delay)
+        if throttle:
+            return self._send(429, b'{"error": "rate limited"}', "application/json",
+                              {"Retry-After": str(self.server.config.retry_after)})
+        self.server.count("completions")
+        prompt = (req.get("messages") or [{}])[-1].get("content", "")
+        # «Перевод» — текст после служебной строки промпта, в верхнем регистре
+        text = prompt.split("the following text:\n", 1)[-1].upper()
+        if not req.get("stream"):
+            answer = {"object": "chat.completion", "model": req.get("model", "mock"),
+                      "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]}
+            return self._send(200, json.dumps(answer).encode(), "application/json")
+        events = [{"choices": [{"index": 0, "delta": {"content": line}}]} for line in text.splitlines(keepends=True)]
+        body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+        self._send(200, body.encode(), "text/event-stream")
+
+    def _send(self, status: int, body: bytes, ctype: Optional[str], headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        if ctype:
+            self.send_header("Content-Type", ctype)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count("bytes", len(body))
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Локальный сайт-новелла для нагрузочных тестов")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--chapters", type=int, default=500, help="глав в книге")
+    ap.add_argument("--page-kb", type=int, default=20, help="примерный размер текста главы, КБ")
+    ap.add_argument("--latency", type=float, default=0.0, help="задержка ответа, мс")
+    ap.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, до мс")
+    ap.add_argument("--fail-429", type=float, default=0.0, help="доля случайных ответов 429")
+    ap.add_argument("--max-rps", type=float, default=0.0, help="больше запросов в секунду — 429 (0 — без предела)")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After в ответе 429, с")
+    args = ap.parse_args(argv)
+
+    cfg = MockConfig(chapters=args.chapters, page_kb=args.page_kb, latency=args.latency, jitter=args.jitter,
+                     fail_429=args.fail_429, max_rps=args.max_rps, retry_after=args.retry_after)
+    srv = MockSite(cfg, args.host, args.port)
+    print(f"mock site: {srv.base}  ({cfg.chapters} глав по ~{cfg.page_kb} КБ, задержка {cfg.latency:g}+{cfg.jitter:g} мс)")
+    print(f"  напрямую: {srv.base}/fiction/1/mock  {srv.base}/book/mock_1")
+    print(f"  через прокси (network.http_proxy = \"{srv.base}\"): http://www.royalroad.com/fiction/1/mock")
+    print(f"  перевод: translation.local.base_url = \"{srv.base}/v1\"")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        print(json.dumps(srv.stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+prefetch.py — подготовка следующих глав, пока редактор работает над текущей
+- после открытия главы N в фоне читаются главы N+1..N+k и переводятся в память переводов
+- переход к следующей главе показывает оригинал и готовый перевод сразу, без запросов к API
+- объём предперевода ограничен бюджетом (оценка токенов оригинала за сеанс) и лимитом запросов в минуту
+- настройки: SETTINGS.json, translation.prefetch_ahead (k, 0 — выключено) и translation.prefetch_budget_tokens
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from book_translate import LimitedTranslator, load_translation_config, load_translation_settings, read_source
+from project_store import ProjectStore
+from translators import MemoryTranslator, TranslationCancelled, Translator, translate_chunked
+from translators.chunking import estimate_tokens
+
+DEFAULT_AHEAD = 2
+DEFAULT_BUDGET_TOKENS = 100_000
+KEEP = 16   # сколько подготовленных глав держать в памяти
+
+Key = Tuple[int, str, str]   # (project_id, book, url)
+
+
+def editor_text(title: str, text: str) -> str:
+    """Текст главы в том виде, в каком его переводит редактор (иначе кэш не совпадёт)."""
+    return (title + "\n\n" + text).strip()
+
+
+def context_key(prompt: str, glossary) -> Tuple[str, object]:
+    return prompt, getattr(glossary, "digest", None) if glossary else None
+
+
+@dataclass
+class Prefetched:
+    title: str
+    text: str
+    translation: Optional[str] = None
+    context: Optional[Tuple[str, object]] = None   # (промпт, глоссарий), с которыми сделан перевод
+
+    def translation_for(self, prompt: str, glossary) -> Optional[str]:
+        return self.translation if self.context == context_key(prompt, glossary) else None
+
+
+class ChapterPrefetcher:
+    """Один фоновый поток; новое расписание заменяет ещё не начатые главы прежнего."""
+
+    def __init__(self, store: ProjectStore, ahead: Optional[int] = None, budget_tokens: Optional[int] = None):
+        cfg = load_translation_config()
+        self.store = store
+        self.ahead = int(cfg.get("prefetch_ahead", DEFAULT_AHEAD)) if ahead is None else ahead
+        self.budget = int(cfg.get("prefetch_budget_tokens", DEFAULT_BUDGET_TOKENS)) if budget_tokens is None else budget_tokens
+        self.spent = 0
+        self.last_error: Optional[str] = None
+        self._ready: "OrderedDict[Key, Prefetched]" = OrderedDict()
+        self._job: Optional[tuple] = None   # последнее расписание; заменяется целиком
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._limited: Dict[int, Translator] = {}
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def get(self, project_id: int, book: str, url: str) -> Optional[Prefetched]:
+        with self._cond:
+            item = self._ready.get((project_id, book, url))
+            if item: self._ready.move_to_end((project_id, book, url))
+            return item
+
+    def schedule(self, translator, project_id: int, book: str, url: str, prompt: str = "", glossary=None):
+        """Глава url открыта: готовим следующие ahead глав книги (перевод — если есть translator).
+
+        translator — Translator или функция без аргументов, которая его вернёт (вызывается в фоновом потоке).
+        """
+        if self.ahead <= 0: return
+        with self._cond:
+            self._job = (translator, project_id, book, url, prompt, glossary)
+            self._cond.notify()
+
+    def close(self):
+        self._stop.set()
+        with self._cond: self._cond.notify()
+
+    def _limit(self, translator: Translator) -> Translator:
+        """Фоновый перевод — по одному запросу и в пределах translation.requests_per_minute."""
+        limited = self._limited.get(id(translator))
+        if limited is None:
+            _, rpm = load_translation_settings()
+            if isinstance(translator, MemoryTranslator):
+                limited = translator.with_inner(LimitedTranslator(translator.inner, 1, rpm))
+            else:
+                limited = LimitedTranslator(translator, 1, rpm)
+            self._limited = {id(translator): limited}
+        return limited
+
+    def _next(self) -> Optional[tuple]:
+        with self._cond:
+            while self._job is None and not self._stop.is_set():
+                self._cond.wait()
+            return None if self._stop.is_set() else self._job
+
+    def _run(self):
+        while True:
+            job = self._next()
+            if job is None: return
+            translator, pid, book, url, prompt, glossary = job
+            try:
+                if callable(translator): translator = translator()
+                rows = self.store.book_chapters(pid, book)
+                pos = next((i for i, r in enumerate(rows) if r[1] == url), None)
+                targets = rows[pos + 1:pos + 1 + self.ahead] if pos is not None else []
+                for _, ch_url, _, path in targets:
+                    with self._cond:
+                        if self._stop.is_set() or self._job is not job: break
+                    self._prepare(translator, pid, book, ch_url, path, prompt, glossary)
+            except Exception as e:
+                self.last_error = str(e)
+            with self._cond:
+                if self._job is job: self._job = None
+
+    def _prepare(self, translator, pid: int, book: str, url: str, path: str, prompt: str, glossary):
+        key = (pid, book, url)
+        item = self.get(pid, book, url)
+        if item is None:
+            title, text = read_source(self.store, pid, book, url, path)
+            item = Prefetched(title, text)
+            with self._cond:
+                self._ready[key] = item
+                while len(self._ready) > KEEP: self._ready.popitem(last=False)
+        if translator is None or item.translation_for(prompt, glossary) is not None: return
+        source = editor_text(item.title, item.text)
+        cost = estimate_tokens(source)
+        if self.spent + cost > self.budget: return
+        self.spent += cost
+        try:
+            item.translation = translate_chunked(self._limit(translator), source, concurrency=1, cancel=self._stop, prompt=prompt, glossary=glossary)
+            item.context = context_key(prompt, glossary)
+        except TranslationCancelled:
+            pass
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+project_store.py — config.db рабочей папки (без зависимостей от Qt)
+- projects: список проектов и их статус
+- chapters: скачанные главы книги (url, заголовок, хэш текста, файл) для режима «Только новые»
+- chapter_texts: очищенный текст глав (zlib) и хэш сырой страницы — для экспорта/перевода без разбора DOCX
+- translations: переведённые главы (хэш исходного текста, файл) — перевод книги продолжается с места остановки
+- crawls / crawl_chapters: журнал загрузки (снимок оглавления и статус каждой главы) для докачки
+- jobs: очередь книг на загрузку (порядок, приоритет, статус, ссылка на журнал)
+"""
+
+import hashlib
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+def ensure_dir(p: Path):
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+def content_hash(title: str, body: str) -> str:
+    return hashlib.sha1(f"{title}\n{body}".encode("utf-8")).hexdigest()
+
+class ProjectStore:
+    def __init__(self, workdir: Path):
+        self.workdir = workdir
+        self.db = ensure_dir(workdir) / "config.db"
+        # Одно соединение на всё приложение (UI, планировщик, писатель глав); доступ сериализуется замком
+        self.conn = sqlite3.connect(self.db, check_same_thread=False, cached_statements=256)
+        self._lock = threading.RLock()
+        # Журналы, которые сейчас качаются в этом процессе (GUI или очередь): их нельзя запускать второй раз
+        self._active_crawls: Set[int] = set()
+        conn = self.conn; cur = conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL"); cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("""CREATE TABLE IF NOT EXISTS projects(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS chapters(
+            project_id INTEGER NOT NULL,
+            book TEXT NOT NULL,
+            url TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            path TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY(project_id, book, url)
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS chapter_texts(
+            project_id INTEGER NOT NULL,
+            book TEXT NOT NULL,
+            url TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            raw_hash TEXT,
+            text BLOB NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY(project_id, book, url)
+        );""")
+        cur.execute("CREATE INDEX IF NOT EXISTS chapter_texts_order ON chapter_texts(project_id, book, idx)")
+        cur.execute("""CREATE TABLE IF NOT EXISTS translations(
+            project_id INTEGER NOT NULL,
+            book TEXT NOT NULL,
+            url TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            path TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY(project_id, book, url)
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS crawls(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER,
+            book_url TEXT NOT NULL,
+            book TEXT NOT NULL,
+            target TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS crawl_chapters(
+            crawl_id INTEGER NOT NULL,
+            idx INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            PRIMARY KEY(crawl_id, idx)
+        );""")
+        cur.execute("""CREATE TABLE IF NOT EXISTS jobs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            project_id INTEGER,
+            base TEXT NOT NULL,
+            only_new INTEGER NOT NULL DEFAULT 0,
+            priority INTEGER NOT NULL DEFAULT 0,
+            position INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            crawl_id INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );""")
+        cur.execute("CREATE INDEX IF NOT EXISTS projects_status ON projects(status, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS chapters_order ON chapters(project_id, book, idx)")
+        cur.execute("CREATE INDEX IF NOT EXISTS jobs_order ON jobs(status, priority, position)")
+        conn.commit(); cur.close()
+
+    @contextmanager
+    def _tx(self):
+        """Курсор общего соединения под замком: коммит на выходе, откат при ошибке."""
+        with self._lock:
+            cur = self.conn.cursor()
+            try:
+                yield cur
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback(); raise
+            finally:
+                cur.close()
+    def _all(self, sql: str, args=()) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+    def _one(self, sql: str, args=()) -> Optional[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, args).fetchone()
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def list(self, status: Optional[str] = "active"):
+        """Проекты со статусом status (None — все), новые сверху."""
+        if status is None:
+            return self._all("SELECT id,name,status,created_at,updated_at FROM projects ORDER BY id DESC")
+        return self._all("SELECT id,name,status,created_at,updated_at FROM projects WHERE status=? ORDER BY id DESC", (status,))
+    def projects_page(self, status: str, after_id: Optional[int] = None, limit: int = 200) -> List[tuple]:
+        """Страница проектов для ленивых списков: новые сверху, начиная после after_id (по индексу, без OFFSET)."""
+        if after_id is None:
+            return self._all("SELECT id,name,status,created_at,updated_at FROM projects WHERE status=? ORDER BY id DESC LIMIT ?", (status, limit))
+        return self._all("SELECT id,name,status,created_at,updated_at FROM projects WHERE status=? AND id<? ORDER BY id DESC LIMIT ?",
+                         (status, after_id, limit))
+    def get(self, project_id: int) -> Optional[tuple]:
+        """(id, name, status, created_at, updated_at) проекта или None."""
+        return self._one("SELECT id,name,status,created_at,updated_at FROM projects WHERE id=?", (project_id,))
+    def create(self, name: str):
+        now = datetime.utcnow().isoformat()
+        with self._tx() as cur:
+            cur.execute("INSERT INTO projects(name,status,created_at,updated_at) VALUES(?, 'active', ?, ?)", (name, now, now))
+            pid = cur.lastrowid
+        base = ensure_dir(self.workdir / name)
+        ensure_dir(base / "Original"); ensure_dir(base / "Translation")
+        return pid
+
+    def chapter_states(self, project_id: int, book: str) -> Dict[str, Tuple[int, str, str, str]]:
+        """url → (idx, title, content_hash, path) для уже скачанных глав книги."""
+        rows = self._all("SELECT url,idx,title,content_hash,path FROM chapters WHERE project_id=? AND book=?", (project_id, book))
+        return {r[0]: r[1:] for r in rows}
+    def book_chapters(self, project_id: int, book: str) -> List[Tuple[int, str, str, str]]:
+        """(idx, url, title, path) глав книги в порядке оглавления."""
+        return self._all("SELECT idx,url,title,path FROM chapters WHERE project_id=? AND book=? ORDER BY idx", (project_id, book))
+    def books(self, project_id: int) -> List[str]:
+        """Книги проекта, у которых есть скачанные главы."""
+        return [r[0] for r in self._all("SELECT DISTINCT book FROM chapters WHERE project_id=? ORDER BY book", (project_id,))]
+    def chapters_page(self, project_id: int, book: str, after_idx: Optional[int] = None, limit: int = 200) -> List[Tuple[int, str, str, str]]:
+        """Страница (idx, url, title, path) глав книги по порядку, начиная после after_idx."""
+        return self._all("SELECT idx,url,title,path FROM chapters WHERE project_id=? AND book=? AND idx>? ORDER BY idx LIMIT ?",
+                         (project_id, book, -1 if after_idx is None else after_idx, limit))
+    def record_chapters(self, project_id: Optional[int], book: str, rows: Iterable[Tuple[str, int, str, str, str]],
+                        crawl_id: Optional[int] = None, texts: Iterable[Tuple[str, int, str, Optional[str], str]] = ()):
+        """Сохраняет пачку (url, idx, title, content_hash, path) одной транзакцией.
+
+        С crawl_id те же главы помечаются в журнале загрузки как скачанные;
+        texts — (url, idx, title, raw_hash, text) для chapter_texts в той же транзакции.
+        """
+        rows = list(rows); now = datetime.utcnow().isoformat()
+        with self._tx() as cur:
+            if project_id is not None:
+                cur.executemany("INSERT OR REPLACE INTO chapters(project_id,book,url,idx,title,content_hash,path,updated_at) VALUES(?,?,?,?,?,?,?,?)",
+                                [(project_id, book, url, idx, title, h, path, now) for url, idx, title, h, path in rows])
+                cur.executemany("INSERT OR REPLACE INTO chapter_texts(project_id,book,url,idx,title,raw_hash,text,updated_at) VALUES(?,?,?,?,?,?,?,?)",
+                                [(project_id, book, url, idx, title, raw, zlib.compress(text.encode("utf-8")), now)
+                                 for url, idx, title, raw, text in texts])
+            if crawl_id is not None:
+                cur.executemany("UPDATE crawl_chapters SET status='done', attempts=attempts+1, error=NULL WHERE crawl_id=? AND idx=?",
+                                [(crawl_id, idx) for _, idx, _, _, _ in rows])
+                cur.execute("UPDATE crawls SET updated_at=? WHERE id=?", (now, crawl_id))
+
+    def chapter_text(self, project_id: int, book: str, url: str) -> Optional[Tuple[str, str, str]]:
+        """(title, text, updated_at) главы из chapter_texts или None."""
+        r = self._one("SELECT title,text,updated_at FROM chapter_texts WHERE project_id=? AND book=? AND url=?", (project_id, book, url))
+        return (r[0], zlib.decompress(r[1]).decode("utf-8"), r[2]) if r else None
+    def translation_states(self, project_id: int, book: str) -> Dict[str, Tuple[str, str]]:
+        """url → (source_hash, path) уже переведённых глав книги."""
+        rows = self._all("SELECT url,source_hash,path FROM translations WHERE project_id=? AND book=?", (project_id, book))
+        return {r[0]: r[1:] for r in rows}
+    def record_translation(self, project_id: int, book: str, url: str, source_hash: str, path: str):
+        with self._tx() as cur:
+            cur.execute("INSERT OR REPLACE INTO translations(project_id,book,url,source_hash,path,updated_at) VALUES(?,?,?,?,?,?)",
+                        (project_id, book, url, source_hash, path, datetime.utcnow().isoformat()))
+
+    # ---------- журнал загрузки ----------
+    def start_crawl(self, project_id: Optional[int], book_url: str, book: str, target: str,
+                    chapters: Iterable[Tuple[int, str, str]]) -> int:
+        """Создаёт журнал со снимком оглавления: (idx, title, url) глав, которые нужно скачать.
+
+        Прерванные журналы той же книги в проекте закрываются — докачивается только последняя загрузка.
+        RuntimeError, если эта книга уже качается в этом процессе (журнал из _active_crawls).
+        """
+        now = datetime.utcnow().isoformat()
+        with self._tx() as cur:
+            if self.crawl_active(project_id, book_url):
+                raise RuntimeError("Эта книга уже загружается.")
+            active = tuple(self._active_crawls)
+            cur.execute("UPDATE crawls SET status='abandoned', updated_at=? WHERE project_id IS ? AND book_url=? AND status IN ('running','stopped','failed') "
+                        f"AND id NOT IN ({','.join('?' * len(active))})", (now, project_id, book_url, *active))
+            cur.execute("INSERT INTO crawls(project_id,book_url,book,target,status,created_at,updated_at) VALUES(?,?,?,?, 'running', ?, ?)",
+                        (project_id, book_url, book, target, now, now))
+            cid = cur.lastrowid
+            cur.executemany("INSERT INTO crawl_chapters(crawl_id,idx,url,title) VALUES(?,?,?,?)",
+                            [(cid, idx, url, title) for idx, title, url in chapters])
+            self._active_crawls.add(cid)
+        return cid
+    def crawl_active(self, project_id: Optional[int], book_url: str) -> bool:
+        """Качается ли сейчас в этом процессе (GUI или очередь) книга book_url проекта."""
+        with self._lock:
+            active = tuple(self._active_crawls)
+            return bool(active) and self._one(f"SELECT 1 FROM crawls WHERE project_id IS ? AND book_url=? AND id IN ({','.join('?' * len(active))})",
+                                              (project_id, book_url, *active)) is not None
+    def claim_crawl(self, crawl_id: int) -> bool:
+        """Отмечает журнал как качающийся; False, если его уже качают. Снимается в finish_crawl."""
+        with self._lock:
+            if crawl_id in self._active_crawls:
+                return False
+            self._active_crawls.add(crawl_id)
+            return True
+    def unfinished_crawl(self, project_id: Optional[int]) -> Optional[Tuple[int, str, str, str]]:
+        """Последняя незавершённая загрузка проекта, которая сейчас не качается: (crawl_id, book_url, book, target)."""
+        with self._lock:
+            active = tuple(self._active_crawls)
+            return self._one("SELECT id,book_url,book,target FROM crawls WHERE project_id IS ? AND status IN ('running','stopped','failed') "
+                             f"AND id NOT IN ({','.join('?' * len(active))}) ORDER BY id DESC LIMIT 1",
+                             (project_id, *active))
+    def crawl_info(self, crawl_id: int) -> Optional[Tuple[int, str, str, str]]:
+        """(crawl_id, book_url, book, target) журнала."""
+        return self._one("SELECT id,book_url,book,target FROM crawls WHERE id=?", (crawl_id,))
+    def crawl_status(self, crawl_id: int) -> Optional[str]:
+        """running / stopped / failed / done / abandoned; None, если журнала нет."""
+        r = self._one("SELECT status FROM crawls WHERE id=?", (crawl_id,))
+        return r[0] if r else None
+    def crawl_pending(self, crawl_id: int) -> List[Tuple[int, str, str]]:
+        """Ещё не скачанные главы журнала: (idx, title, url) по порядку."""
+        return self._all("SELECT idx,title,url FROM crawl_chapters WHERE crawl_id=? AND status!='done' ORDER BY idx", (crawl_id,))
+    def fail_crawl_chapter(self, crawl_id: int, idx: int, error: str):
+        with self._tx() as cur:
+            cur.execute("UPDATE crawl_chapters SET status='failed', attempts=attempts+1, error=? WHERE crawl_id=? AND idx=?",
+                        (error, crawl_id, idx))
+    def finish_crawl(self, crawl_id: int, status: str):
+        """status: done / stopped / failed."""
+        with self._tx() as cur:
+            cur.execute("UPDATE crawls SET status=?, updated_at=? WHERE id=?", (status, datetime.utcnow().isoformat(), crawl_id))
+            self._active_crawls.discard(crawl_id)
+
+    # ---------- очередь загрузки ----------
+    JOB_FIELDS = "id,url,project_id,base,only_new,priority,position,status,crawl_id,error"
+
+    def add_job(self, url: str, project_id: Optional[int], base: str, only_new: bool = False, priority: int = 0) -> int:
+        now = datetime.utcnow().isoformat()
+        with self._tx() as cur:
+            pos = cur.execute("SELECT COALESCE(MAX(position),0)+1 FROM jobs").fetchone()[0]
+            cur.execute("INSERT INTO jobs(url,project_id,base,only_new,priority,position,created_at,updated_at) VALUES(?,?,?,?,?,?,?,?)",
+                        (url, project_id, base, int(only_new), priority, pos, now, now))
+            jid = cur.lastrowid
+        return jid
+    def list_jobs(self, status: Optional[str] = None) -> List[tuple]:
+        """Задания в порядке выполнения: сначала приоритетные, затем по позиции."""
+        if status is None:
+            return self._all(f"SELECT {self.JOB_FIELDS} FROM jobs ORDER BY priority DESC, position")
+        return self._all(f"SELECT {self.JOB_FIELDS} FROM jobs WHERE status=? ORDER BY priority DESC, position", (status,))
+    def get_job(self, job_id: int) -> Optional[tuple]:
+        return self._one(f"SELECT {self.JOB_FIELDS} FROM jobs WHERE id=?", (job_id,))
+    def update_job(self, job_id: int, **fields):
+        """Меняет status / priority / crawl_id / error задания."""
+        allowed = {"status", "priority", "crawl_id", "error"}
+        assert set(fields) <= allowed, fields
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        cols = ", ".join(f"{k}=?" for k in fields)
+        with self._tx() as cur:
+            cur.execute(f"UPDATE jobs SET {cols} WHERE id=?", (*fields.values(), job_id))
+    def move_job(self, job_id: int, delta: int):
+        """Сдвигает задание на delta мест внутри его уровня приоритета."""
+        with self._tx() as cur:
+            row = cur.execute("SELECT priority FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row:
+                ids = [r[0] for r in cur.execute("SELECT id FROM jobs WHERE priority=? ORDER BY position", (row[0],))]
+                i = ids.index(job_id); j = max(0, min(len(ids) - 1, i + delta))
+                ids.insert(j, ids.pop(i))
+                cur.executemany("UPDATE jobs SET position=? WHERE id=?", [(n, jid) for n, jid in enumerate(ids, start=1)])
+    def remove_job(self, job_id: int):
+        with self._tx() as cur:
+            cur.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+    def requeue_running_jobs(self):
+        """После падения приложения задания «running» снова ставятся в очередь."""
+        with self._tx() as cur:
+            cur.execute("UPDATE jobs SET status='queued' WHERE status='running'")
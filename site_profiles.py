@@ -15,9 +15,16 @@ import urllib.parse
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-import requests
+import lxml.html
 from bs4 import BeautifulSoup
 
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:  # cssselect не установлен — только BeautifulSoup
+    CSSSelector = None
+
+import http_client
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36"
@@ -25,7 +32,7 @@ HEADERS = {
 
 def get(url, **kw):
     kw.setdefault("headers", HEADERS)
-    resp = requests.get(url, **kw, timeout=30)
+    resp = http_client.get(url, **kw)
     resp.raise_for_status()
     return resp
 
@@ -36,11 +43,14 @@ def normalize_whitespace(text: str) -> str:
     text = re.sub(r'\n{3,}', '\n\n', text)
     return text.strip()
 
+# Вырезаются из контейнера текста главы
+BAD_TAGS = 'script,style,ins,iframe,nav,header,footer'
+
 def text_from_nodes(soup, selectors: List[str]) -> str:
     for sel in selectors:
         node = soup.select_one(sel)
         if node:
-            for bad in node.select('script,style,ins,iframe,nav,header,footer'):
+            for bad in node.select(BAD_TAGS):
                 bad.decompose()
             for br in node.find_all("br"):
                 br.replace_with("\n")
@@ -48,6 +58,76 @@ def text_from_nodes(soup, selectors: List[str]) -> str:
             return normalize_whitespace(txt)
     return ""
 
+# ---------- Быстрый разбор страницы главы (lxml + cssselect) ----------
+# Тот же результат, что у BeautifulSoup + text_from_nodes, но без построения дерева bs4.
+# Нужен пакет cssselect; без него всегда используется BeautifulSoup.
+_ENGINE = "auto"
+_CSS_CACHE = {}
+
+def set_engine(name: str):
+    """'bs4', 'lxml' или 'auto' (lxml, если установлен cssselect)."""
+    global _ENGINE
+    if name not in ("auto", "bs4", "lxml"):
+        raise ValueError(f"Неизвестный движок разбора: {name}")
+    if name == "lxml" and CSSSelector is None:
+        raise RuntimeError("Для движка lxml нужен пакет cssselect")
+    _ENGINE = name
+
+def engine() -> str:
+    if _ENGINE == "auto":
+        return "lxml" if CSSSelector is not None else "bs4"
+    return _ENGINE
+
+def _css(sel: str):
+    c = _CSS_CACHE.get(sel)
+    if c is None:
+        c = _CSS_CACHE[sel] = CSSSelector(sel, translator="html")
+    return c
+
+# Текст этих тегов bs4 в get_text не включает (Script, Stylesheet, TemplateString)
+_HIDDEN_TAGS = frozenset(("script", "style", "template"))
+_BAD_TAG_NAMES = frozenset(BAD_TAGS.split(",")) | _HIDDEN_TAGS
+
+# Пробельные строки bs4 сворачивает при разборе: в "\n", если в ней есть перевод строки, иначе в " "
+# (кроме <pre>/<textarea>); без этого lxml давал лишние пустые абзацы и другой content_hash
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+_PRE_TAGS = frozenset(("pre", "textarea"))
+
+def _bs4_string(s: str, pre: bool) -> str:
+    if pre or s.strip(_ASCII_SPACES):
+        return s
+    return "\n" if "\n" in s else " "
+
+def _ordered_strings(node, skip=_HIDDEN_TAGS, pre=False):
+    # Текстовые узлы в порядке документа, как их отдаёт bs4 (комментарии пропускаются).
+    # Поддеревья тегов из skip пропускаются, но их хвост (.tail) остаётся отдельной строкой —
+    # как после decompose() в bs4; drop_tree() приклеил бы его к предыдущему тексту.
+    inner = pre or node.tag in _PRE_TAGS
+    if isinstance(node.tag, str) and node.text:
+        yield _bs4_string(node.text, inner)
+    for child in node:
+        if isinstance(child.tag, str) and child.tag not in skip:
+            yield from _ordered_strings(child, skip, inner)
+        if child.tail:
+            yield _bs4_string(child.tail, inner)
+
+def extract_lxml(html, title_sel: str, body_sels: List[str]) -> Tuple[str, str]:
+    if not html or not html.strip():
+        return "Chapter", ""
+    if isinstance(html, str) and html.lstrip().startswith("<?xml"):
+        html = html.encode("utf-8")
+    root = lxml.html.fromstring(html)
+    found = _css(title_sel)(root)
+    ch_title = "".join(s.strip() for s in _ordered_strings(found[0])) if found else "Chapter"
+    for sel in body_sels:
+        nodes = _css(sel)(root)
+        if nodes:
+            node = nodes[0]
+            for br in node.iter("br"):
+                br.text = "\n"
+            return ch_title, normalize_whitespace("\n".join(_ordered_strings(node, _BAD_TAG_NAMES)))
+    return ch_title, ""
+
 @dataclass
 class Chapter:
     title: str
@@ -55,17 +135,42 @@ class Chapter:
 
 class BaseProfile:
     domains: List[str] = []
+    # Селекторы страницы главы: заголовок (CSS-группа) и кандидаты на контейнер текста по приоритету
+    chapter_title: str = "h1"
+    chapter_body: List[str] = []
+    # Сколько глав качать одновременно (вежливый предел для сайта)
+    concurrency: int = 2
+    # Token bucket для доменов профиля: запросов в секунду и допустимый всплеск
+    rate_limit: float = 2.0
+    burst: int = 2
     def detect(self, url: str) -> bool:
         host = urllib.parse.urlparse(url).netloc.lower()
         return any(d in host for d in self.domains)
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
         raise NotImplementedError
     def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        raise NotImplementedError
+        return self.extract_chapter(http_client.decode_body(*self.fetch_raw(url)))
+    def fetch_raw(self, url: str) -> Tuple[bytes, Optional[str]]:
+        """Только сеть: тело страницы главы и кодировка из заголовков; разбор — в extract_chapter."""
+        r = get(url)
+        return r.content, r.encoding
+    def extract_chapter(self, html: str) -> Tuple[str, str]:
+        """(заголовок, текст) главы по селекторам chapter_title / chapter_body."""
+        if engine() == "lxml":
+            return extract_lxml(html, self.chapter_title, self.chapter_body)
+        soup = BeautifulSoup(html, "lxml")
+        t = soup.select_one(self.chapter_title)
+        ch_title = t.get_text(strip=True) if t else "Chapter"
+        return ch_title, text_from_nodes(soup, self.chapter_body)
 
 # ---------- RoyalRoad (fixed) ----------
 class RoyalRoadProfile(BaseProfile):
     domains = ["royalroad.com", "www.royalroad.com"]
+    concurrency = 4
+    rate_limit = 4.0
+    burst = 4
+    chapter_title = "h1.chapter-title, h1, .chapter-title"
+    chapter_body = ["div.chapter-content", "div.chapter-inner", "div.fic-section", "article", "div#chapter-content"]
 
     def _fiction_base(self, url: str) -> str:
         p = urllib.parse.urlparse(url)
@@ -77,7 +182,7 @@ class RoyalRoadProfile(BaseProfile):
         return urllib.parse.urlunparse((p.scheme, p.netloc, base_path, "", "", ""))
 
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url)
+        r = get(url, revalidate=True)
         soup = BeautifulSoup(r.text, "lxml")
 
         title_el = soup.select_one("h1.fiction-title, h1")
@@ -115,22 +220,13 @@ class RoyalRoadProfile(BaseProfile):
                 uniq.append(ch); seen.add(ch.url)
         return book_title, uniq
 
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url)
-        soup = BeautifulSoup(r.text, "lxml")
-        title = soup.select_one("h1.chapter-title, h1, .chapter-title")
-        ch_title = title.get_text(strip=True) if title else "Chapter"
-        body = text_from_nodes(
-            soup,
-            ["div.chapter-content", "div.chapter-inner", "div.fic-section", "article", "div#chapter-content"]
-        )
-        return ch_title, body
-
 # ---------- MVLEmpyr ----------
 class MVLEmpyrProfile(BaseProfile):
     domains = ["mvlempyr.com", "www.mvlempyr.com"]
+    chapter_title = "h1.entry-title, h1[class*=chapter], h1"
+    chapter_body = ["article", "div.entry-content", "div#chapter-content", "div.text-left"]
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
+        r = get(url, revalidate=True); soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1.entry-title, h1[class*=novel], h1")
         book_title = title_el.get_text(strip=True) if title_el else "MVLEmpyr_Novel"
         chapters: List[Chapter] = []
@@ -150,18 +246,14 @@ class MVLEmpyrProfile(BaseProfile):
             if ch.url not in seen:
                 uniq.append(ch); seen.add(ch.url)
         return book_title, uniq
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1.entry-title, h1[class*=chapter], h1")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["article","div.entry-content","div#chapter-content","div.text-left"])
-        return ch_title, body
 
 # ---------- Novatls ----------
 class NovatlsProfile(BaseProfile):
     domains = ["novatls.com", "www.novatls.com"]
+    chapter_title = "h1.entry-title, h1"
+    chapter_body = ["article", "div.entry-content", "div#chapter-content"]
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
+        r = get(url, revalidate=True); soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1.entry-title, h1")
         book_title = title_el.get_text(strip=True) if title_el else "Novatls_Series"
         chapters: List[Chapter] = []
@@ -178,18 +270,14 @@ class NovatlsProfile(BaseProfile):
             if ch.url not in seen:
                 uniq.append(ch); seen.add(ch.url)
         return book_title, uniq
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1.entry-title, h1")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["article","div.entry-content","div#chapter-content"])
-        return ch_title, body
 
 # ---------- Ellotl ----------
 class EllotlProfile(BaseProfile):
     domains = ["ellotl.com","www.ellotl.com"]
+    chapter_title = "h1.entry-title, h1"
+    chapter_body = ["article", "div.entry-content", "div#chapter-content"]
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
+        r = get(url, revalidate=True); soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1.entry-title, h1")
         book_title = title_el.get_text(strip=True) if title_el else "Ellotl_Series"
         chapters: List[Chapter] = []
@@ -202,20 +290,16 @@ class EllotlProfile(BaseProfile):
             if ch.url not in seen:
                 uniq.append(ch); seen.add(ch.url)
         return book_title, uniq
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url); soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1.entry-title, h1")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["article","div.entry-content","div#chapter-content"])
-        return ch_title, body
 
 # ---------- Webnovel ----------
 class WebnovelProfile(BaseProfile):
     """Very basic support for webnovel.com"""
     domains = ["webnovel.com", "www.webnovel.com"]
+    chapter_title = "h1, .j_chapterName, .cha-tit"
+    chapter_body = ["div#chapter-content", "div.cha-words", "div#j_chapterBox"]
 
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url)
+        r = get(url, revalidate=True)
         soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1, .j_bookName")
         book_title = title_el.get_text(strip=True) if title_el else "Webnovel_Book"
@@ -235,20 +319,14 @@ class WebnovelProfile(BaseProfile):
                 seen.add(ch.url)
         return book_title, uniq
 
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url)
-        soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1, .j_chapterName, .cha-tit")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["div#chapter-content", "div.cha-words", "div#j_chapterBox"])
-        return ch_title, body
-
 # ---------- Ranobelib ----------
 class RanobelibProfile(BaseProfile):
     domains = ["ranobelib.me", "www.ranobelib.me"]
+    chapter_title = "h1"
+    chapter_body = ["div.reader-container", "div#reader"]
 
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url)
+        r = get(url, revalidate=True)
         soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1")
         book_title = title_el.get_text(strip=True) if title_el else "Ranobelib_Book"
@@ -267,20 +345,17 @@ class RanobelibProfile(BaseProfile):
                 seen.add(ch.url)
         return book_title, uniq
 
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url)
-        soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["div.reader-container", "div#reader" ])
-        return ch_title, body
-
 # ---------- FanqieNovel ----------
 class FanqieNovelProfile(BaseProfile):
     domains = ["fanqienovel.com", "www.fanqienovel.com"]
+    concurrency = 1
+    rate_limit = 1.0
+    burst = 1
+    chapter_title = "h1"
+    chapter_body = ["div#chapter-content", "div.novel-content"]
 
     def parse_book(self, url: str) -> Tuple[str, List[Chapter]]:
-        r = get(url)
+        r = get(url, revalidate=True)
         soup = BeautifulSoup(r.text, "lxml")
         title_el = soup.select_one("h1")
         book_title = title_el.get_text(strip=True) if title_el else "FanqieNovel_Book"
@@ -299,14 +374,6 @@ class FanqieNovelProfile(BaseProfile):
                 seen.add(ch.url)
         return book_title, uniq
 
-    def fetch_chapter(self, url: str) -> Tuple[str, str]:
-        r = get(url)
-        soup = BeautifulSoup(r.text, "lxml")
-        t = soup.select_one("h1")
-        ch_title = t.get_text(strip=True) if t else "Chapter"
-        body = text_from_nodes(soup, ["div#chapter-content", "div.novel-content"])
-        return ch_title, body
-
 # Registry
 PROFILES = [
     RoyalRoadProfile(),
@@ -318,6 +385,20 @@ PROFILES = [
     FanqieNovelProfile(),
 ]
 
+PROFILE_BY_NAME = {type(p).__name__: p for p in PROFILES}
+
+for _p in PROFILES:
+    http_client.limiter.register(_p.domains, _p.rate_limit, _p.burst)
+
+def extract_page(profile: str, content: bytes, encoding: Optional[str], parser: str = "auto") -> Tuple[str, str]:
+    """Разбор сырой страницы главы по имени класса профиля — для пула процессов.
+
+    parser — движок разбора вызывающего процесса (engine()): set_engine в пул не передаётся.
+    """
+    if parser != _ENGINE:
+        set_engine(parser)
+    return PROFILE_BY_NAME[profile].extract_chapter(http_client.decode_body(content, encoding))
+
 def detect_profile(url: str) -> Optional[BaseProfile]:
     for p in PROFILES:
         if p.detect(url):
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Общее для тестов: корень репозитория в sys.path (модули лежат плоско, как у app.py)."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = ROOT / "benchmarks" / "fixtures"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,75 @@
+import random
+import threading
+
+import pytest
+
+from translators import Translator
+from translators.chunking import estimate_tokens, split_chunks, stream_chunked, translate_chunked
+
+
+def join(chunks):
+    return "".join(c + sep for c, sep in chunks)
+
+
+SAMPLES = [
+    "",
+    "one line",
+    "a\nb\n\nc\n",
+    "\n\n\n",
+    "Short.\n" + "Long sentence number one. " * 40 + "\nTail line.",
+    "没有空格的中文句子。" * 80 + "\n第二行。",
+    "x" * 3000,
+    "Ends with spaces.   \n   Starts with spaces.",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+@pytest.mark.parametrize("max_tokens", [5, 16, 64, 4096])
+def test_round_trip(text, max_tokens):
+    assert join(split_chunks(text, max_tokens)) == text
+
+
+def test_random_round_trip():
+    rng = random.Random(1)
+    words = ["word", "longer", "x", "", "Sentence.", "end!", "\n", "\n\n", "  "]
+    for _ in range(300):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 200)))
+        max_tokens = rng.choice([8, 32, 128])
+        chunks = split_chunks(text, max_tokens)
+        assert join(chunks) == text
+        assert all(estimate_tokens(c) <= max_tokens for c, _ in chunks)
+
+
+def test_chunks_respect_budget_and_keep_lines():
+    text = "\n".join(f"Line {i} of the chapter." for i in range(200))
+    chunks = split_chunks(text, 50)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 50 for c, _ in chunks)
+    assert join(chunks) == text
+    assert chunks[-1][1] == ""
+
+
+class Tagger(Translator):
+    max_chunk_tokens = 20
+
+    def __init__(self):
+        super().__init__("")
+
+    def translate(self, text, **kwargs):
+        return f"<{text}>"
+
+
+def test_translate_chunked_keeps_order_and_separators():
+    text = "\n".join(f"line {i}" for i in range(40))
+    out = translate_chunked(Tagger(), text, concurrency=4)
+    chunks = split_chunks(text, Tagger.max_chunk_tokens)
+    assert out == "".join(f"<{c}>" + sep for c, sep in chunks)
+    assert "".join(stream_chunked(Tagger(), text, concurrency=4)) == out
+
+
+def test_translate_chunked_cancel():
+    from translators import TranslationCancelled
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(TranslationCancelled):
+        translate_chunked(Tagger(), "a\nb", cancel=cancel)
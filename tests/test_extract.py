@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Разбор страниц глав на сохранённых страницах benchmarks/fixtures: lxml даёт то же, что bs4."""
+
+import random
+
+import pytest
+
+import site_profiles
+from conftest import FIXTURES
+
+pytestmark = pytest.mark.skipif(site_profiles.CSSSelector is None, reason="нет cssselect — движок lxml недоступен")
+
+PAGES = [(prof, path) for prof in site_profiles.PROFILES
+         for path in sorted(FIXTURES.glob(type(prof).__name__[:-len("Profile")].lower() + "_chapter*.html"))]
+
+
+@pytest.fixture(autouse=True)
+def restore_engine():
+    yield
+    site_profiles.set_engine("auto")
+
+
+def extract(prof, html, engine):
+    site_profiles.set_engine(engine)
+    return prof.extract_chapter(html)
+
+
+@pytest.mark.parametrize("prof,path", PAGES, ids=[p.stem for _, p in PAGES])
+def test_engines_agree_on_fixtures(prof, path):
+    html = path.read_text(encoding="utf-8")
+    title, text = extract(prof, html, "bs4")
+    assert text
+    assert extract(prof, html, "lxml") == (title, text)
+
+
+def test_inline_fixture_keeps_words_apart():
+    html = (FIXTURES / "royalroad_chapter_inline.html").read_text(encoding="utf-8")
+    _, text = extract(site_profiles.RoyalRoadProfile(), html, "lxml")
+    assert "Loose text before the ad.\nLoose text after the ad." in text
+    assert "Template content" not in text and "ads.push" not in text
+
+
+PIECES = ["<p>a</p>", "<p>b c</p>", "text", " ", "\n", "\n  ", "\t", "<script>x</script>", "<style>y</style>",
+          "<!-- c -->", "<ins class='ad'></ins>", "<br>", "<span>s</span>", "<em> e </em>", "<template><p>t</p></template>",
+          "<nav>n</nav>", "<div>d</div>", "&nbsp;", " \n ", "<iframe></iframe>", "<p> </p>", "<pre> \n x </pre>"]
+
+
+def test_engines_agree_on_random_markup():
+    rng = random.Random(0)
+    prof = site_profiles.RoyalRoadProfile()
+    for _ in range(500):
+        body = "".join(rng.choice(PIECES) for _ in range(rng.randint(1, 10)))
+        html = f'<html><body><div class="chapter-content">{body}</div></body></html>'
+        assert extract(prof, html, "lxml") == extract(prof, html, "bs4"), body
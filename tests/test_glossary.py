@@ -0,0 +1,60 @@
+from translators.glossary import GlossaryIndex, relevant_terms
+
+
+def test_finds_terms_in_order_of_occurrence():
+    g = GlossaryIndex({"Sect": "Секта", "Elder Wu": "Старейшина У", "dao": "дао"})
+    assert list(g.find("Elder Wu left the sect to seek the Dao.")) == ["Elder Wu", "Sect", "dao"]
+
+
+def test_case_insensitive():
+    g = GlossaryIndex({"Qi": "ци"})
+    assert g.find("QI flows") == {"Qi": "ци"}
+
+
+def test_word_boundaries():
+    g = GlossaryIndex({"art": "искусство", "Ash": "Пепел"})
+    assert g.find("The party started") == {}
+    assert g.find("Washington and cash") == {}
+    assert g.find("an art, then Ash.") == {"art": "искусство", "Ash": "Пепел"}
+
+
+def test_plural_and_possessive_suffixes():
+    g = GlossaryIndex({"dragon": "дракон", "box": "ящик"})
+    for text in ("dragons", "the dragon's hoard", "the dragon’s hoard"):
+        assert g.find(text) == {"dragon": "дракон"}, text
+    assert g.find("boxes") == {"box": "ящик"}
+    assert g.find("dragonfly") == {}
+    assert g.find("dragonsfly") == {}
+
+
+def test_overlapping_terms():
+    g = GlossaryIndex({"Heavenly Dao": "Небесное Дао", "Dao": "Дао", "Heaven": "Небо"})
+    assert set(g.find("the Heavenly Dao")) == {"Heavenly Dao", "Dao"}
+
+
+def test_cjk_terms_need_no_boundaries():
+    g = GlossaryIndex({"师父": "учитель", "Ki": "ки"})
+    assert g.find("他的师父来了") == {"师父": "учитель"}
+    assert g.find("Kirin") == {}
+
+
+def test_non_word_term_edges():
+    g = GlossaryIndex({"C++": "Си++", "[System]": "[Система]"})
+    assert set(g.find("Learn C++ from the [System]!")) == {"C++", "[System]"}
+
+
+def test_load_many_to_one(tmp_path):
+    path = tmp_path / "glossary.txt"
+    path.write_text("# comment\nLi Wei|Wei = Ли Вэй\nsect\tсекта\nqi;ци\n\nbroken line\n", encoding="utf-8")
+    g = GlossaryIndex.load(path)
+    assert g.entries == {"Li Wei": "Ли Вэй", "Wei": "Ли Вэй", "sect": "секта", "qi": "ци"}
+
+
+def test_digest_tracks_entries():
+    assert GlossaryIndex({"a": "1"}).digest == GlossaryIndex([("a", "1")]).digest
+    assert GlossaryIndex({"a": "1"}).digest != GlossaryIndex({"a": "2"}).digest
+
+
+def test_relevant_terms_accepts_plain_dict():
+    assert relevant_terms("a dragon", {"dragon": "дракон", "sword": "меч"}) == {"dragon": "дракон"}
+    assert relevant_terms("anything", None) == {}
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import pytest
+import requests
+
+import http_client
+import mock_site
+from http_cache import ResponseCache
+
+
+def response(body: bytes, **headers) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r._content = body
+    r.headers.update(headers)
+    r.encoding = "utf-8"
+    return r
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ResponseCache(tmp_path / "http.db")
+    yield c
+    c.close()
+
+
+def test_store_and_lookup(cache):
+    cache.store("http://a/1", response(b"page", ETag='"x"', **{"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+    hit = cache.lookup("http://a/1")
+    assert hit.body == b"page"
+    assert hit.conditional_headers() == {"If-None-Match": '"x"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert hit.to_response().text == "page"
+    assert cache.lookup("http://a/2") is None
+
+
+def test_same_body_stored_once(cache):
+    cache.store("http://a/1", response(b"same" * 100))
+    cache.store("http://a/2", response(b"same" * 100))
+    assert cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    cache.store("http://a/1", response(b"other"))
+    cache.store("http://a/2", response(b"other"))
+    assert cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "http.db", max_bytes=3000)
+    for i in range(5):
+        cache.store(f"http://a/{i}", response(os.urandom(800)))
+        time.sleep(0.01)
+        if i == 2:
+            cache.touch("http://a/0")
+    assert cache._total <= 3000
+    assert cache.lookup("http://a/0") is not None   # недавно использовалась
+    assert cache.lookup("http://a/1") is None and cache.lookup("http://a/2") is None
+    assert cache.lookup("http://a/3") is not None and cache.lookup("http://a/4") is not None
+    total = cache._conn.execute("SELECT SUM(size) FROM blobs").fetchone()[0]
+    assert total == cache._total
+    cache.close()
+
+
+def test_freshness(tmp_path):
+    cache = ResponseCache(tmp_path / "http.db", max_age=0.05)
+    cache.store("http://a/1", response(b"x"))
+    assert cache.is_fresh(cache.lookup("http://a/1"))
+    time.sleep(0.06)
+    assert not cache.is_fresh(cache.lookup("http://a/1"))
+    cache.close()
+
+
+@pytest.fixture
+def site(tmp_path):
+    srv = mock_site.MockSite(mock_site.MockConfig(chapters=3, page_kb=1)).start()
+    http_client.limiter.register(["127.0.0.1"], 1000, 100)
+    http_client.use_cache(tmp_path / "http.db")
+    yield srv
+    http_client.use_cache(None)
+    srv.stop()
+
+
+def test_revalidation_uses_304(site):
+    url = site.base + "/fiction/1/mock/chapter/1/chapter-1"
+    first = http_client.get(url)
+    assert first.status_code == 200 and site.stats["chapters"] == 1
+    again = http_client.get(url)   # свежая запись — без сети
+    assert again.content == first.content and site.stats["requests"] == 1
+    checked = http_client.get(url, revalidate=True)   # условный запрос, сервер отвечает 304
+    assert checked.status_code == 200 and checked.content == first.content
+    assert site.stats["not_modified"] == 1
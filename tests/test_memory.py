@@ -0,0 +1,89 @@
+import pytest
+
+from translators import MemoryTranslator, TranslationMemory, Translator
+from translators.memory import fingerprint, normalize
+
+
+class Upper(Translator):
+    """Deterministic engine: upper-cases the text and counts calls."""
+
+    def __init__(self):
+        super().__init__("")
+        self.calls = []
+
+    def translate(self, text, **kwargs):
+        self.calls.append(text)
+        return text.upper()
+
+
+@pytest.fixture
+def memory(tmp_path):
+    tm = TranslationMemory(tmp_path / "tm.db")
+    yield tm
+    tm.close()
+
+
+def test_normalize_collapses_spaces_and_forms():
+    assert normalize("“Hi”  — there ") == normalize('"Hi" - there')
+
+
+def test_normalize_keeps_line_structure():
+    assert normalize("a\nb") != normalize("a b")
+    assert normalize("\na\nb") != normalize("a\nb")
+    assert normalize("a\n\nb") != normalize("a\nb")
+    assert normalize("a  \n  b") == normalize("a\nb")
+
+
+def test_exact_and_normalized_lookup(memory):
+    memory.store("fp", [("He said “hi”.", "ОН СКАЗАЛ")])
+    assert memory.lookup("fp", "He said “hi”.") == "ОН СКАЗАЛ"
+    assert memory.lookup("fp", 'He  said "hi".') == "ОН СКАЗАЛ"
+    assert memory.lookup("fp", "He said hi.") is None
+    assert memory.lookup("other", "He said “hi”.") is None
+
+
+@pytest.mark.parametrize("text", [
+    "First line.\nSecond line.",
+    "\nFirst line.\nSecond line.",
+    "First line.\n\nSecond line.\n",
+])
+def test_round_trip_matches_uncached(memory, text):
+    engine = Upper()
+    tm = MemoryTranslator(engine, memory)
+    # Warm the memory with neighbouring variants of the same text
+    for warm in ("First line.\nSecond line.", "\nFirst line.\nSecond line.", "First line. Second line."):
+        tm.translate(warm)
+    assert tm.translate(text) == Upper().translate(text)
+
+
+def test_spacing_variant_is_a_hit(memory):
+    engine = Upper()
+    tm = MemoryTranslator(engine, memory)
+    tm.translate("First line.\nSecond line.")
+    engine.calls.clear()
+    assert tm.translate("  First   line. \nSecond line.") == "FIRST LINE.\nSECOND LINE."
+    assert engine.calls == []
+
+
+def test_only_missing_lines_are_sent(memory):
+    engine = Upper()
+    tm = MemoryTranslator(engine, memory)
+    tm.translate("one\ntwo")
+    engine.calls.clear()
+    assert tm.translate("one\ntwo\nthree") == "ONE\nTWO\nTHREE"
+    assert engine.calls == ["three"]
+    assert tm.stats["hits"] >= 2
+
+
+def test_stream_matches_translate(memory):
+    tm = MemoryTranslator(Upper(), memory)
+    tm.translate("cached line")
+    text = "cached line\nnew line\n\nanother"
+    assert "".join(tm.translate_stream(text)) == Upper().translate(text)
+
+
+def test_fingerprint_depends_on_context():
+    engine = Upper()
+    assert fingerprint(engine, target_lang="ru") != fingerprint(engine, target_lang="en")
+    assert fingerprint(engine, prompt="a") != fingerprint(engine, prompt="b")
+    assert fingerprint(MemoryTranslator(engine, None)) == fingerprint(engine)
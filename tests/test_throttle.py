@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from throttle import BACKOFF_CAP, TokenBucket, backoff
+
+
+def test_burst_then_rate():
+    b = TokenBucket(rate=50, burst=3)
+    t = time.monotonic()
+    for _ in range(3):
+        b.acquire()
+    assert time.monotonic() - t < 0.05
+    for _ in range(5):
+        b.acquire()
+    assert time.monotonic() - t >= 5 / 50 * 0.8
+
+
+def test_penalize_halves_once_per_wave_and_blocks():
+    b = TokenBucket(rate=8, burst=1)
+    b.penalize(0.2)
+    assert b.current == 4
+    b.penalize(0.2)   # та же волна 429: пауза ещё идёт
+    assert b.current == 4
+    assert b.blocked_until - time.monotonic() > 0.1
+    t = time.monotonic()
+    b.acquire()
+    assert time.monotonic() - t >= 0.15
+
+
+def test_penalize_floor():
+    b = TokenBucket(rate=8)
+    for _ in range(10):
+        b.penalize(0.001)
+        time.sleep(0.002)
+    assert b.current == pytest.approx(1.0)
+
+
+def test_retry_after_zero_keeps_rate():
+    b = TokenBucket(rate=8)
+    b.penalize(0)
+    assert b.current == 8
+    assert b.blocked_until == 0
+
+
+def test_reward_recovers_multiplicatively():
+    b = TokenBucket(rate=8)
+    b.current = 1.0
+    n = 0
+    while b.current < b.rate:
+        b.reward()
+        n += 1
+    assert b.current == 8
+    assert n <= 10
+
+
+def test_backoff_bounds():
+    for attempt in range(12):
+        d = backoff(attempt)
+        assert 0 <= d <= min(BACKOFF_CAP, 2 ** attempt)
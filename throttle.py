@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+throttle.py — общее для сетевого слоя и перевода, без сетевых зависимостей
+- путь к SETTINGS.json и чтение его секций
+- token bucket с адаптивным замедлением (AIMD) на ответы «слишком часто»
+- экспоненциальная задержка с джиттером для повторов
+
+http_client (сайты) и book_translate (API переводчиков) берут это отсюда,
+чтобы перевод не тянул за собой requests, urllib3 и кэш ответов.
+"""
+
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent / "SETTINGS.json"
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+def load_section(name: str) -> dict:
+    """Секция name файла SETTINGS.json (пустой dict, если файла или секции нет)."""
+    if not CONFIG_PATH.exists():
+        return {}
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f).get(name, {})
+
+
+class TokenBucket:
+    """Token bucket с AIMD: на 429/503 скорость падает вдвое, на успехах растёт в INCREASE раз до rate.
+
+    Одна волна 429 (ответы на запросы, ушедшие до первого из них) режет скорость один раз,
+    а рост по умножению возвращает её к rate за десяток успешных ответов, а не за десятки.
+    """
+
+    DECREASE = 0.5
+    INCREASE = 1.25
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.current = rate
+        self.tokens = float(self.burst)
+        self.blocked_until = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.current)
+        self._stamp = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.current
+            time.sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        """Ответ «слишком часто»: пауза delay секунд; delay <= 0 (Retry-After: 0) скорость не трогает."""
+        if delay <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now >= self.blocked_until:   # пока идёт пауза, это та же волна 429
+                self.current = max(self.rate / 8, self.current * self.DECREASE)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.tokens = 0.0
+
+    def reward(self) -> None:
+        with self._lock:
+            self.current = min(self.rate, self.current * self.INCREASE)
+
+
+def backoff(attempt: int) -> float:
+    """Экспоненциальная задержка с полным джиттером."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
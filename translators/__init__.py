@@ -1,2 +1,52 @@
-from .base import Translator
-from .gemini import GeminiTranslator
+"""Translator backends and helpers.
+
+Names are resolved lazily (PEP 562): importing the package is free, and a backend's SDK
+(google.generativeai, requests) is only loaded when its class is first used.
+"""
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "Translator": ".base",
+    "GeminiTranslator": ".gemini",
+    "TranslationCancelled": ".chunking",
+    "split_chunks": ".chunking",
+    "stream_chunked": ".chunking",
+    "translate_chunked": ".chunking",
+    "MemoryTranslator": ".memory",
+    "TranslationMemory": ".memory",
+    "GlossaryIndex": ".glossary",
+    "relevant_terms": ".glossary",
+    "MockTranslator": ".local",
+    "OpenAICompatibleTranslator": ".local",
+    "TranslationFailed": ".manager",
+    "TranslatorManager": ".manager",
+    "build_translator": ".manager",
+}
+
+__all__ = list(_EXPORTS)
+
+# Never executed, but type checkers and PyInstaller's import scan still see these imports.
+if TYPE_CHECKING:
+    from .base import Translator
+    from .chunking import TranslationCancelled, split_chunks, stream_chunked, translate_chunked
+    from .gemini import GeminiTranslator
+    from .glossary import GlossaryIndex, relevant_terms
+    from .local import MockTranslator, OpenAICompatibleTranslator
+    from .manager import TranslationFailed, TranslatorManager, build_translator
+    from .memory import MemoryTranslator, TranslationMemory
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
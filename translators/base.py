@@ -1,12 +1,55 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Iterable, Iterator, Mapping, Optional
+
+from .glossary import relevant_terms
+
+
+def build_prompt(
+    text: str,
+    source_lang: str = "auto",
+    target_lang: str = "ru",
+    prompt: str = "",
+    glossary: Optional[Mapping[str, str]] = None,
+) -> str:
+    """Prompt shared by LLM backends; only glossary terms that occur in text are included."""
+    parts = []
+    terms = relevant_terms(text, glossary)
+    if terms:
+        glossary_text = "\n".join(f"{k} = {v}" for k, v in terms.items())
+        parts.append("Use the following glossary:\n" + glossary_text)
+    if prompt:
+        parts.append(prompt)
+    parts.append(f"Translate from {source_lang} to {target_lang} the following text:\n{text}")
+    return "\n\n".join(parts)
+
+
+def strip_stream(deltas: Iterable[str]) -> Iterator[str]:
+    """Streaming counterpart of str.strip(): drops leading and trailing whitespace of the whole stream."""
+    started, held = False, ""
+    for delta in deltas:
+        if not started:
+            delta = delta.lstrip()
+            if not delta:
+                continue
+            started = True
+        body = delta.rstrip()
+        if body:
+            yield held + body
+            held = delta[len(body):]
+        else:
+            held += delta
 
 
 class Translator(ABC):
     """Base translator interface."""
 
+    # Largest chunk (estimated tokens) sent in one request; see chunking.split_chunks.
+    max_chunk_tokens: int = 1500
+    # How many chunk requests may run at once.
+    concurrency: int = 4
+
     def __init__(self, api_key: Optional[str] = None) -> None:
         self.api_key = api_key
 
@@ -17,7 +60,19 @@ class Translator(ABC):
         source_lang: str = "auto",
         target_lang: str = "ru",
         prompt: str = "",
-        glossary: Optional[Dict[str, str]] = None,
+        glossary: Optional[Mapping[str, str]] = None,
     ) -> str:
-        """Translate text and return result."""
+        """Translate text and return result.
+
+        glossary may be a plain dict or a compiled GlossaryIndex; implementations
+        should pass only relevant_terms(text, glossary) to the model (see build_prompt).
+        """
         raise NotImplementedError
+
+    def translate_stream(self, text: str, **kwargs) -> Iterator[str]:
+        """Yield the translation in pieces as the model produces it; "".join() equals translate().
+
+        The default yields the whole translate() result at once; backends with a
+        streaming API override it so the first words arrive before the last are generated.
+        """
+        yield self.translate(text, **kwargs)
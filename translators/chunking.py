@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .base import Translator
+
+# CJK ideographs, kana and hangul are roughly one token each; other scripts ~4 chars per token.
+_WIDE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_SENTENCE = re.compile(r".*?(?:[.!?。！？…]+\s*|$)", re.S)
+
+
+class TranslationCancelled(Exception):
+    """Raised by translate_chunked when the cancel event is set."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound token estimate, good enough for sizing chunks."""
+    wide = len(_WIDE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def _split_long(paragraph: str, max_tokens: int) -> List[str]:
+    """Split an oversized paragraph at sentence ends (hard cut as a last resort)."""
+    pieces, cur = [], ""
+    for sentence in filter(None, _SENTENCE.findall(paragraph)):
+        while estimate_tokens(sentence) > max_tokens:
+            cut = max(1, len(sentence) * max_tokens // estimate_tokens(sentence))
+            if cur:
+                pieces.append(cur); cur = ""
+            pieces.append(sentence[:cut]); sentence = sentence[cut:]
+        if cur and estimate_tokens(cur + sentence) > max_tokens:
+            pieces.append(cur); cur = ""
+        cur += sentence
+    if cur:
+        pieces.append(cur)
+    return pieces
+
+
+def split_chunks(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """Group whole lines into chunks of at most max_tokens.
+
+    Returns (chunk, separator) pairs: "".join(c + sep for c, sep in chunks) == text.
+    The separator is "\\n" between lines; a line too long for one chunk is cut at
+    sentence ends and its pieces are rejoined with a space (or nothing, for CJK).
+    """
+    chunks: List[Tuple[str, str]] = []
+    cur: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        n = estimate_tokens(line) + 1
+        if n > max_tokens:
+            if cur:
+                chunks.append(("\n".join(cur), "\n")); cur, size = [], 0
+            pieces = _split_long(line, max_tokens)
+            for i, piece in enumerate(pieces):
+                sep = "\n" if i == len(pieces) - 1 else piece[len(piece.rstrip()):]
+                chunks.append((piece.rstrip() if sep != "\n" else piece, sep))
+            continue
+        if cur and size + n > max_tokens:
+            chunks.append(("\n".join(cur), "\n")); cur, size = [], 0
+        cur.append(line); size += n
+    if cur:
+        chunks.append(("\n".join(cur), "\n"))
+    if chunks:
+        chunks[-1] = (chunks[-1][0], "")
+    return chunks
+
+
+def translate_chunked(
+    translator: Translator,
+    text: str,
+    concurrency: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **kwargs,
+) -> str:
+    """Translate text chunk by chunk in parallel and stitch the results in order.
+
+    kwargs are passed to translator.translate(); progress(done, total) is called
+    as chunks finish. Blank chunks are passed through untranslated.
+    """
+    chunks = split_chunks(text, translator.max_chunk_tokens)
+    total = len(chunks)
+    results: List[str] = [""] * total
+    done = 0
+    lock = threading.Lock()
+
+    def work(i: int) -> None:
+        nonlocal done
+        if cancel is not None and cancel.is_set():
+            raise TranslationCancelled()
+        chunk = chunks[i][0]
+        results[i] = translator.translate(chunk, **kwargs) if chunk.strip() else chunk
+        with lock:
+            done += 1
+            if progress:
+                progress(done, total)
+
+    workers = max(1, min(total, concurrency or translator.concurrency))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as pool:
+        futures = [pool.submit(work, i) for i in range(total)]
+        wait(futures, return_when=FIRST_EXCEPTION)
+        for f in futures:
+            f.cancel()
+        for f in futures:
+            if f.done() and not f.cancelled() and f.exception() is not None:
+                raise f.exception()
+    if cancel is not None and cancel.is_set():
+        raise TranslationCancelled()
+    return "".join(r + sep for r, (_, sep) in zip(results, chunks))
+
+
+def stream_chunked(
+    translator: Translator,
+    text: str,
+    concurrency: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **kwargs,
+) -> Iterator[str]:
+    """Like translate_chunked, but yields the translation in order as it is generated.
+
+    Chunks still run in parallel through translator.translate_stream(); the pieces of the
+    chunk being read are yielded as they arrive, later chunks are buffered until their turn.
+    "".join() of the result equals translate_chunked() for the same answers.
+    """
+    chunks = split_chunks(text, translator.max_chunk_tokens)
+    total = len(chunks)
+    parts: List[List[str]] = [[] for _ in chunks]
+    cond = threading.Condition()
+    done = 0
+
+    def work(i: int) -> None:
+        nonlocal done
+        if cancel is not None and cancel.is_set():
+            raise TranslationCancelled()
+        chunk = chunks[i][0]
+        deltas = translator.translate_stream(chunk, **kwargs) if chunk.strip() else [chunk]
+        for delta in deltas:
+            if cancel is not None and cancel.is_set():
+                raise TranslationCancelled()
+            with cond:
+                parts[i].append(delta)
+                cond.notify_all()
+        with cond:
+            done += 1
+            n = done
+        if progress:
+            progress(n, total)
+
+    def wake(_) -> None:
+        with cond:
+            cond.notify_all()
+
+    workers = max(1, min(total, concurrency or translator.concurrency))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+    futures = [pool.submit(work, i) for i in range(total)]
+    for f in futures:
+        f.add_done_callback(wake)
+    try:
+        for i in range(total):
+            sent = 0
+            while True:
+                with cond:
+                    # The timeout only bounds how late a cancel is noticed while a request is running
+                    while len(parts[i]) == sent and not futures[i].done() and not (cancel is not None and cancel.is_set()):
+                        cond.wait(0.2)
+                    new, finished = parts[i][sent:], futures[i].done()
+                sent += len(new)
+                for delta in new:
+                    yield delta
+                if cancel is not None and cancel.is_set():
+                    raise TranslationCancelled()
+                failed = next((f for f in futures if f.done() and not f.cancelled() and f.exception() is not None), None)
+                if failed is not None:
+                    raise failed.exception()
+                if finished and sent == len(parts[i]):
+                    break
+            if chunks[i][1]:
+                yield chunks[i][1]
+    finally:
+        for f in futures:
+            f.cancel()
+        pool.shutdown(wait=False)
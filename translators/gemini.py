@@ -1,19 +1,23 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Iterator, Mapping, Optional
 
 import google.generativeai as genai
 
-from .base import Translator
+from .base import Translator, build_prompt, strip_stream
 
 
 class GeminiTranslator(Translator):
     """Translator implementation using Google Gemini."""
 
-    def __init__(self, api_key: str) -> None:
+    # gemini-pro answers with at most 2048 tokens, and a translation is longer than its source.
+    max_chunk_tokens = 1200
+
+    def __init__(self, api_key: str, model_name: str = "gemini-pro") -> None:
         super().__init__(api_key)
         genai.configure(api_key=api_key)
-        self._model = genai.GenerativeModel("gemini-pro")
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(self.model_name)
 
     def translate(
         self,
@@ -21,15 +25,20 @@ class GeminiTranslator(Translator):
         source_lang: str = "auto",
         target_lang: str = "ru",
         prompt: str = "",
-        glossary: Optional[Dict[str, str]] = None,
+        glossary: Optional[Mapping[str, str]] = None,
     ) -> str:
-        parts = []
-        if glossary:
-            glossary_text = "\n".join(f"{k} = {v}" for k, v in glossary.items())
-            parts.append("Use the following glossary:\n" + glossary_text)
-        if prompt:
-            parts.append(prompt)
-        parts.append(f"Translate from {source_lang} to {target_lang} the following text:\n{text}")
-        final_prompt = "\n\n".join(parts)
+        final_prompt = build_prompt(text, source_lang, target_lang, prompt, glossary)
         resp = self._model.generate_content(final_prompt)
         return resp.text.strip()
+
+    def translate_stream(
+        self,
+        text: str,
+        source_lang: str = "auto",
+        target_lang: str = "ru",
+        prompt: str = "",
+        glossary: Optional[Mapping[str, str]] = None,
+    ) -> Iterator[str]:
+        final_prompt = build_prompt(text, source_lang, target_lang, prompt, glossary)
+        resp = self._model.generate_content(final_prompt, stream=True)
+        yield from strip_stream(chunk.text for chunk in resp)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+# English inflections tolerated after a term: "dragon" also matches "dragons", "dragon's".
+_SUFFIXES = ("", "s", "es", "'s", "’s")
+_SPLIT = re.compile(r"\t| = |=|;")
+
+
+def _fold(text: str) -> str:
+    # lower() keeps string length (unlike casefold/NFKC), so match offsets stay valid in the original text
+    return text.lower()
+
+
+def _wordy(ch: str) -> bool:
+    """Letters/digits of space-separated scripts; CJK text has no word boundaries to check."""
+    return ch.isalnum() and ord(ch) < 0x2E80
+
+
+class GlossaryIndex:
+    """Aho–Corasick automaton over glossary terms.
+
+    Finds every term that occurs in a text in one pass, regardless of glossary size, so a
+    prompt only carries the entries a chunk actually needs. Matching is case-insensitive;
+    Latin/Cyrillic terms must stand on word boundaries (plural/possessive endings allowed).
+    Several source spellings may map to one translation (many-to-one).
+    """
+
+    def __init__(self, entries: Union[Mapping[str, str], Iterable[Tuple[str, str]]] = ()) -> None:
+        pairs = entries.items() if isinstance(entries, Mapping) else entries
+        self.entries: Dict[str, str] = {}
+        for src, tgt in pairs:
+            src, tgt = src.strip(), tgt.strip()
+            if src and tgt:
+                self.entries[src] = tgt
+        self._build()
+        self.digest = hashlib.sha1(repr(sorted(self.entries.items())).encode("utf-8")).hexdigest()
+
+    def _build(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for term in self.entries:
+            node = 0
+            for ch in _fold(term):
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({}); self._fail.append(0); self._out.append([])
+                node = nxt
+            self._out[node].append(term)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def items(self):
+        return self.entries.items()
+
+    def _on_boundary(self, text: str, start: int, end: int, term: str) -> bool:
+        if _wordy(term[0]) and start > 0 and _wordy(text[start - 1]):
+            return False
+        if not _wordy(term[-1]):
+            return True
+        for suffix in _SUFFIXES:
+            stop = end + len(suffix)
+            if _fold(text[end:stop]) == suffix and (stop >= len(text) or not _wordy(text[stop])):
+                return True
+        return False
+
+    def find(self, text: str) -> Dict[str, str]:
+        """Entries whose terms occur in text, in order of first occurrence."""
+        found: Dict[str, str] = {}
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(_fold(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for term in out[node]:
+                if term not in found and self._on_boundary(text, i + 1 - len(term), i + 1, term):
+                    found[term] = self.entries[term]
+        return found
+
+    @classmethod
+    def load(cls, path: Path) -> "GlossaryIndex":
+        """Reads "term = translation" lines (tab or ";" also work); "a|b = x" maps both spellings to x."""
+        pairs = []
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = _SPLIT.split(line, maxsplit=1)
+                if len(parts) == 2:
+                    pairs += [(src, parts[1]) for src in parts[0].split("|")]
+        return cls(pairs)
+
+
+def relevant_terms(text: str, glossary: Optional[Union[GlossaryIndex, Mapping[str, str]]]) -> Dict[str, str]:
+    """Only the glossary entries that occur in text (a plain dict is compiled on the fly)."""
+    if not glossary:
+        return {}
+    index = glossary if isinstance(glossary, GlossaryIndex) else GlossaryIndex(glossary)
+    return index.find(text)
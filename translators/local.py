@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from typing import Iterator, Mapping, Optional
+
+import requests
+
+from .base import Translator, build_prompt, strip_stream
+
+
+class OpenAICompatibleTranslator(Translator):
+    """Any server speaking the OpenAI chat-completions API: a local LLM (llama.cpp, Ollama,
+    LM Studio, vLLM) or the stand-in server used for load tests."""
+
+    def __init__(self, base_url: str, model_name: str = "", api_key: Optional[str] = None, timeout: float = 120.0) -> None:
+        super().__init__(api_key)
+        self.base_url = base_url.rstrip("/")
+        self.model_name = model_name
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def translate(
+        self,
+        text: str,
+        source_lang: str = "auto",
+        target_lang: str = "ru",
+        prompt: str = "",
+        glossary: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        resp = self._post(build_prompt(text, source_lang, target_lang, prompt, glossary), stream=False)
+        return resp.json()["choices"][0]["message"]["content"].strip()
+
+    def translate_stream(
+        self,
+        text: str,
+        source_lang: str = "auto",
+        target_lang: str = "ru",
+        prompt: str = "",
+        glossary: Optional[Mapping[str, str]] = None,
+    ) -> Iterator[str]:
+        resp = self._post(build_prompt(text, source_lang, target_lang, prompt, glossary), stream=True)
+        with resp:
+            yield from strip_stream(self._sse_deltas(resp))
+
+    def _post(self, content: str, stream: bool) -> requests.Response:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": content}],
+            "temperature": 0.2,
+            "stream": stream,
+        }
+        resp = self._session.post(f"{self.base_url}/chat/completions", json=body, headers=headers,
+                                  timeout=self.timeout, stream=stream)
+        resp.raise_for_status()
+        return resp
+
+    @staticmethod
+    def _sse_deltas(resp: requests.Response) -> Iterator[str]:
+        """Content pieces from a server-sent events stream ("data: {...}" lines, "data: [DONE]" at the end)."""
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+class MockTranslator(Translator):
+    """In-process stand-in for tests and benchmarks: returns the text after a simulated delay.
+
+    latency + uniform jitter seconds per call; fail_rate is the share of calls that raise.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, fail_rate: float = 0.0,
+                 prefix: str = "", seed: Optional[int] = None) -> None:
+        super().__init__(None)
+        self.model_name = "mock"
+        self.latency, self.jitter, self.fail_rate, self.prefix = latency, jitter, fail_rate, prefix
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def translate(
+        self,
+        text: str,
+        source_lang: str = "auto",
+        target_lang: str = "ru",
+        prompt: str = "",
+        glossary: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        return "".join(self._run(text, stream=False))
+
+    def translate_stream(self, text: str, **kwargs) -> Iterator[str]:
+        """Yields line by line, spreading the simulated delay over the lines."""
+        return self._run(text, stream=True)
+
+    def _run(self, text: str, stream: bool) -> Iterator[str]:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.fail_rate
+        lines = text.split("\n")
+        out = [self.prefix + line if line.strip() else line for line in lines]
+        if not stream:
+            time.sleep(delay)
+            if fail:
+                raise RuntimeError("mock translator failure")
+            yield "\n".join(out)
+            return
+        for i, line in enumerate(out):
+            time.sleep(delay / len(out))
+            if fail and i == len(out) // 2:
+                raise RuntimeError("mock translator failure")
+            yield line if i == 0 else "\n" + line
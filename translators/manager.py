@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .base import Translator
+
+
+class TranslationFailed(Exception):
+    """Every backend failed or timed out; errors holds (backend name, exception) pairs."""
+
+    def __init__(self, errors: List[Tuple[str, Exception]]) -> None:
+        super().__init__("; ".join(f"{name}: {e}" for name, e in errors) or "no translator backends")
+        self.errors = errors
+
+
+def backend_name(translator: Translator) -> str:
+    model = getattr(translator, "model_name", "")
+    return f"{type(translator).__name__}({model})" if model else type(translator).__name__
+
+
+class TranslatorManager(Translator):
+    """Several backends behind one Translator, in order of preference.
+
+    - fallback: an error or a call longer than `timeout` moves on to the next backend;
+    - hedging: if the current call is still running after `hedge_after` seconds, the next
+      backend is started as well and whichever answers first wins (one hedge per call).
+    A timed-out call is abandoned, not killed: its thread finishes in the background.
+    """
+
+    def __init__(self, backends: Sequence[Translator], timeout: Optional[float] = None,
+                 hedge_after: Optional[float] = None) -> None:
+        if not backends:
+            raise ValueError("at least one translator backend is required")
+        super().__init__(backends[0].api_key)
+        self.backends = list(backends)
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_chunk_tokens = min(b.max_chunk_tokens for b in self.backends)
+        self.concurrency = self.backends[0].concurrency
+        self.model_name = "+".join(backend_name(b) for b in self.backends)
+        # Same engine twice (e.g. two local servers) gets "#2", "#3" so stats stay per backend
+        self._names: Dict[int, str] = {}
+        for i, b in enumerate(self.backends):
+            name = backend_name(b)
+            self._names[id(b)] = name if name not in self._names.values() else f"{name}#{i + 1}"
+        self.stats: Dict[str, Dict[str, int]] = {n: {"ok": 0, "failed": 0, "timeouts": 0, "hedged": 0}
+                                                 for n in self._names.values()}
+        self._stats_lock = threading.Lock()
+        # Room for abandoned calls on top of the normal load
+        self._pool = ThreadPoolExecutor(max_workers=max(8, 4 * self.concurrency * len(self.backends)),
+                                        thread_name_prefix="translator")
+
+    def _count(self, backend: Translator, key: str) -> None:
+        with self._stats_lock:
+            self.stats[self._names[id(backend)]][key] += 1
+
+    def translate(self, text: str, **kwargs) -> str:
+        remaining = list(self.backends)
+        pending: Dict[Future, Tuple[Translator, float]] = {}
+        errors: List[Tuple[str, Exception]] = []
+        started = time.monotonic()
+        hedged = False
+
+        def launch(hedge: bool = False) -> None:
+            backend = remaining.pop(0)
+            if hedge:
+                self._count(backend, "hedged")
+            pending[self._pool.submit(backend.translate, text, **kwargs)] = (backend, time.monotonic())
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            waits = []
+            if self.timeout:
+                waits.append(min(t for _, t in pending.values()) + self.timeout - now)
+            if self.hedge_after is not None and not hedged and remaining:
+                waits.append(started + self.hedge_after - now)
+            done, _ = wait(list(pending), timeout=max(0.0, min(waits)) if waits else None, return_when=FIRST_COMPLETED)
+            for fut in done:
+                backend, _ = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    self._count(backend, "failed")
+                    errors.append((self._names[id(backend)], e))
+                    continue
+                self._count(backend, "ok")
+                return result
+
+            now = time.monotonic()
+            if self.timeout:
+                for fut, (backend, t) in list(pending.items()):
+                    if now - t >= self.timeout:
+                        del pending[fut]
+                        self._count(backend, "timeouts")
+                        errors.append((self._names[id(backend)], TimeoutError(f"no answer in {self.timeout:g}s")))
+            if remaining and not pending:
+                launch()
+            elif remaining and self.hedge_after is not None and not hedged and now - started >= self.hedge_after:
+                hedged = True
+                launch(hedge=True)
+        raise TranslationFailed(errors)
+
+    def translate_stream(self, text: str, **kwargs) -> Iterator[str]:
+        """Fallback, timeout and hedging apply until the first piece arrives.
+
+        The backend that answers first gets the stream, the others are abandoned; an error
+        after that point propagates, since part of the translation is already out.
+        """
+        backends = list(self.backends)
+        events: "queue.Queue[Tuple[Translator, str, object]]" = queue.Queue()
+        running: Dict[Translator, Tuple[float, threading.Event]] = {}
+        errors: List[Tuple[str, Exception]] = []
+        started = time.monotonic()
+        hedged = False
+        chosen: Optional[Translator] = None
+
+        def pump(backend: Translator, stop: threading.Event) -> None:
+            try:
+                for delta in backend.translate_stream(text, **kwargs):
+                    if stop.is_set():
+                        return
+                    events.put((backend, "delta", delta))
+                events.put((backend, "end", None))
+            except Exception as e:
+                events.put((backend, "error", e))
+
+        def launch(hedge: bool = False) -> None:
+            backend = backends.pop(0)
+            if hedge:
+                self._count(backend, "hedged")
+            running[backend] = (time.monotonic(), threading.Event())
+            self._pool.submit(pump, backend, running[backend][1])
+
+        launch()
+        try:
+            while running:
+                wait_for = None
+                if chosen is None:
+                    now = time.monotonic()
+                    waits = []
+                    if self.timeout:
+                        waits.append(min(t for t, _ in running.values()) + self.timeout - now)
+                    if self.hedge_after is not None and not hedged and backends:
+                        waits.append(started + self.hedge_after - now)
+                    wait_for = max(0.0, min(waits)) if waits else None
+                try:
+                    backend, kind, value = events.get(timeout=wait_for)
+                except queue.Empty:
+                    backend, kind, value = None, "", None
+                if backend is not None and backend in running:
+                    if kind == "delta":
+                        if chosen is None:
+                            chosen = backend
+                            for other, (_, stop) in list(running.items()):
+                                if other is not chosen:
+                                    stop.set(); del running[other]
+                        yield value
+                        continue
+                    del running[backend]
+                    if kind == "end":
+                        self._count(backend, "ok")
+                        return
+                    self._count(backend, "failed")
+                    if chosen is not None:
+                        raise value
+                    errors.append((self._names[id(backend)], value))
+
+                now = time.monotonic()
+                if self.timeout and chosen is None:
+                    for other, (t, stop) in list(running.items()):
+                        if now - t >= self.timeout:
+                            stop.set(); del running[other]
+                            self._count(other, "timeouts")
+                            errors.append((self._names[id(other)], TimeoutError(f"no answer in {self.timeout:g}s")))
+                if backends and not running:
+                    launch()
+                elif backends and self.hedge_after is not None and not hedged and now - started >= self.hedge_after:
+                    hedged = True
+                    launch(hedge=True)
+        finally:
+            for _, stop in running.values():
+                stop.set()
+        raise TranslationFailed(errors)
+
+
+def make_backend(name: str, cfg: Mapping, api_key: Optional[str] = None) -> Translator:
+    """One backend by its name in the translation section: gemini, local (OpenAI-compatible) or mock.
+
+    Backend modules are imported here, so an unused SDK is never loaded.
+    """
+    if name == "gemini":
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not set")
+        from .gemini import GeminiTranslator
+        return GeminiTranslator(api_key, cfg.get("gemini_model") or "gemini-pro")
+    if name == "local":
+        from .local import OpenAICompatibleTranslator
+        local = cfg.get("local") or {}
+        return OpenAICompatibleTranslator(local.get("base_url") or "http://127.0.0.1:8000/v1", local.get("model") or "",
+                                          local.get("api_key") or None, float(cfg.get("timeout") or 120))
+    if name == "mock":
+        from .local import MockTranslator
+        return MockTranslator(**(cfg.get("mock") or {}))
+    raise ValueError(f"unknown translator backend: {name}")
+
+
+def build_translator(cfg: Mapping, api_key: Optional[str] = None) -> Optional[Translator]:
+    """Translator from the translation settings: provider first, then the fallback list.
+
+    Backends that cannot be created (no key, unknown name) are skipped; None if none is left.
+    A single backend is returned as is.
+    """
+    names = [cfg.get("provider") or "gemini"] + [n for n in cfg.get("fallback") or [] if n]
+    backends = []
+    for name in dict.fromkeys(names):
+        try:
+            backends.append(make_backend(name, cfg, api_key))
+        except ValueError:
+            continue
+    if not backends:
+        return None
+    if len(backends) == 1:
+        return backends[0]
+    return TranslatorManager(backends, timeout=float(cfg.get("timeout") or 0) or None,
+                             hedge_after=float(cfg.get("hedge_after") or 0) or None)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .base import Translator
+
+# Horizontal whitespace only: line breaks are part of the segment's structure
+_SPACES = re.compile(r"[^\S\n]+")
+_LINE_EDGES = re.compile(r" ?\n ?")
+_FORMS = str.maketrans({
+    "“": '"', "”": '"', "„": '"', "«": '"', "»": '"', "‘": "'", "’": "'",
+    "—": "-", "–": "-", "\u00a0": " ", "\u200b": "",
+})
+# Cached segments separated by at least this many lines split a miss into separate requests.
+SPAN_GAP = 4
+
+
+def normalize(segment: str) -> str:
+    """Key for normalized matching: NFKC, unified quotes/dashes, collapsed spaces.
+
+    Line breaks (blank lines included) are kept, so texts that differ in line structure
+    never share a key and a cached translation always has the source's shape.
+    """
+    text = _SPACES.sub(" ", unicodedata.normalize("NFKC", segment).translate(_FORMS))
+    return _LINE_EDGES.sub("\n", text).strip(" ")
+
+
+def _glossary_key(glossary) -> object:
+    if not glossary:
+        return None
+    digest = getattr(glossary, "digest", None)  # GlossaryIndex hashes its entries once
+    return digest or sorted(glossary.items())
+
+
+def fingerprint(translator: Translator, **kwargs) -> str:
+    """Everything besides the text that changes the translation: engine, model, languages, prompt, glossary."""
+    while getattr(translator, "inner", None) is not None:  # wrappers (limits, memory) do not change the result
+        translator = translator.inner
+    ctx = {
+        "engine": type(translator).__name__,
+        "model": getattr(translator, "model_name", ""),
+        "source_lang": kwargs.get("source_lang", "auto"),
+        "target_lang": kwargs.get("target_lang", "ru"),
+        "prompt": kwargs.get("prompt", ""),
+        "glossary": _glossary_key(kwargs.get("glossary")),
+    }
+    return hashlib.sha1(json.dumps(ctx, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _key(fp: str, segment: str) -> str:
+    return hashlib.sha1(f"{fp}\0{segment}".encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """SQLite store of source segment -> translation, keyed by segment hash + fingerprint."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS segments(
+            key TEXT PRIMARY KEY,
+            norm_key TEXT NOT NULL,
+            src TEXT NOT NULL,
+            tgt TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            used_at REAL NOT NULL
+        )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS segments_norm ON segments(norm_key)")
+        self._conn.commit()
+
+    def lookup(self, fp: str, segment: str) -> Optional[str]:
+        """Exact match first, then normalized match; None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT key, tgt FROM segments WHERE key=?", (_key(fp, segment),)).fetchone()
+            if row is None:
+                row = self._conn.execute("SELECT key, tgt FROM segments WHERE norm_key=? LIMIT 1",
+                                         (_key(fp, normalize(segment)),)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE segments SET hits=hits+1, used_at=? WHERE key=?", (time.time(), row[0]))
+            self._conn.commit()
+            return row[1]
+
+    def store(self, fp: str, pairs: List[Tuple[str, str]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments(key, norm_key, src, tgt, created_at, used_at) VALUES(?,?,?,?,?,?)",
+                [(_key(fp, src), _key(fp, normalize(src)), src, tgt, now, now) for src, tgt in pairs if src.strip()])
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryTranslator(Translator):
+    """Translator that consults a TranslationMemory line by line before calling the inner engine.
+
+    Only the lines that miss are sent; runs of misses separated by fewer than SPAN_GAP cached
+    lines go out as one request so the model keeps context. Translations are stored per line
+    when the answer has the same number of lines, and always for the request as a whole.
+    """
+
+    def __init__(self, inner: Translator, memory: TranslationMemory) -> None:
+        super().__init__(inner.api_key)
+        self.inner = inner
+        self.memory = memory
+        self.max_chunk_tokens = inner.max_chunk_tokens
+        self.concurrency = inner.concurrency
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()  # chunks of one chapter are translated from several threads
+
+    def with_inner(self, inner: Translator) -> "MemoryTranslator":
+        """Same memory in front of another engine (e.g. a rate-limited wrapper of this one's)."""
+        clone = MemoryTranslator(inner, self.memory)
+        clone.stats, clone._stats_lock = self.stats, self._stats_lock
+        return clone
+
+    def _count(self, hits: int, misses: int = 0) -> None:
+        with self._stats_lock:
+            self.stats["hits"] += hits
+            self.stats["misses"] += misses
+
+    def _plan(self, fp: str, text: str) -> Tuple[List[str], List[Optional[str]], List[List[int]]]:
+        """(lines, cached translation or None per line, [start, end] spans of lines to request)."""
+        lines = text.split("\n")
+        out: List[Optional[str]] = [line if not line.strip() else self.memory.lookup(fp, line) for line in lines]
+        misses = [i for i, t in enumerate(out) if t is None]
+        self._count(sum(1 for line, t in zip(lines, out) if line.strip() and t is not None), len(misses))
+
+        spans: List[List[int]] = []
+        for i in misses:
+            if spans and i - spans[-1][1] <= SPAN_GAP:
+                spans[-1][1] = i
+            else:
+                spans.append([i, i])
+        return lines, out, spans
+
+    def _store_span(self, fp: str, lines: List[str], out: List[Optional[str]], start: int, end: int, tgt: str) -> None:
+        src = "\n".join(lines[start:end + 1])
+        tgt_lines = tgt.split("\n")
+        pairs = [(src, tgt)]
+        if len(tgt_lines) == end - start + 1:
+            out[start:end + 1] = tgt_lines
+            pairs += list(zip(lines[start:end + 1], tgt_lines))
+        else:
+            out[start:end + 1] = [tgt] + [None] * (end - start)
+        self.memory.store(fp, pairs)
+
+    def translate(self, text: str, **kwargs) -> str:
+        fp = fingerprint(self.inner, **kwargs)
+        whole = self.memory.lookup(fp, text)
+        if whole is not None:
+            self._count(1)
+            return whole
+
+        lines, out, spans = self._plan(fp, text)
+        for start, end in spans:
+            tgt = self.inner.translate("\n".join(lines[start:end + 1]), **kwargs)
+            self._store_span(fp, lines, out, start, end, tgt)
+        result = "\n".join(t for t in out if t is not None)
+        self.memory.store(fp, [(text, result)])
+        return result
+
+    def translate_stream(self, text: str, **kwargs) -> Iterator[str]:
+        """Cached lines come out at once, the misses stream from the inner engine in between."""
+        fp = fingerprint(self.inner, **kwargs)
+        whole = self.memory.lookup(fp, text)
+        if whole is not None:
+            self._count(1)
+            yield whole
+            return
+
+        lines, out, spans = self._plan(fp, text)
+        pos = 0
+        for start, end in spans + [[len(lines), len(lines)]]:
+            if start > pos:
+                yield ("\n" if pos else "") + "\n".join(out[pos:start])
+            if start == len(lines):
+                break
+            if start:
+                yield "\n"
+            parts = []
+            for delta in self.inner.translate_stream("\n".join(lines[start:end + 1]), **kwargs):
+                parts.append(delta)
+                yield delta
+            self._store_span(fp, lines, out, start, end, "".join(parts))
+            pos = end + 1
+        self.memory.store(fp, [(text, "\n".join(t for t in out if t is not None))])
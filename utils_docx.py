@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import io
+import os
 import re
+import zipfile
 from pathlib import Path
-from docx import Document
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from threading import Lock, get_ident
+from xml.sax.saxutils import escape
 
 INVALID = r'<>:"/\\|?*'
 
@@ -15,18 +18,95 @@ def safe_name(name: str, maxlen: int = 120) -> str:
         name = name[:maxlen].rstrip()
     return name or "chapter"
 
+# ---------- Быстрая запись DOCX ----------
+# Документ собирается строкой XML за один проход, а остальные части (стили, тема, настройки)
+# берутся из шаблона python-docx один раз и дописываются в архив уже сжатыми.
+_XML_BAD = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_template = None
+_template_lock = Lock()
+
+def _load_template():
+    """(zip без word/document.xml, начало document.xml до <w:body>, хвост с <w:sectPr>)."""
+    global _template
+    with _template_lock:
+        if _template is None:
+            # Обычный import, а не find_spec: так PyInstaller видит python-docx и кладёт его в сборку
+            try:
+                import docx
+            except ImportError as e:
+                raise RuntimeError("Для записи DOCX нужен пакет python-docx (pip install python-docx)") from e
+            src = Path(docx.__file__).parent / "templates" / "default.docx"
+            if not src.is_file():
+                raise RuntimeError(f"Не найден шаблон DOCX из python-docx: {src}")
+            buf = io.BytesIO()
+            with zipfile.ZipFile(src) as zin, zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zout:
+                for item in zin.infolist():
+                    if item.filename != "word/document.xml":
+                        zout.writestr(item.filename, zin.read(item.filename))
+                doc = zin.read("word/document.xml").decode("utf-8")
+            body = doc.index("<w:body>") + len("<w:body>")
+            _template = (buf.getvalue(), doc[:body], doc[doc.index("<w:sectPr"):])
+        return _template
+
+def _run(text: str) -> str:
+    text = escape(_XML_BAD.sub("", text))
+    parts = []
+    for i, chunk in enumerate(text.split("\t")):
+        if i:
+            parts.append("<w:tab/>")
+        if chunk:
+            space = ' xml:space="preserve"' if chunk != chunk.strip() else ""
+            parts.append(f"<w:t{space}>{chunk}</w:t>")
+    return "<w:r>" + "".join(parts) + "</w:r>"
+
+def paragraph_xml(text: str, heading: bool = False, style: str = "Heading1") -> str:
+    """<w:p> как у python-docx: add_heading(level=1) по центру или обычный абзац."""
+    if heading:
+        return f'<w:p><w:pPr><w:pStyle w:val="{style}"/><w:jc w:val="center"/></w:pPr>' + _run(text) + "</w:p>"
+    return "<w:p>" + _run(text) + "</w:p>" if text else "<w:p/>"
+
+# Разрыв страницы как у python-docx add_page_break()
+PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+def chapter_xml(chapter_title: str, text: str):
+    """Абзацы главы: заголовок и по абзацу на строку (пустые строки — пустые абзацы)."""
+    yield paragraph_xml(chapter_title, heading=True)
+    for line in text.split("\n"):
+        yield paragraph_xml(line.strip())
+
+def temp_path(path: Path) -> Path:
+    """Имя временного файла рядом с path, своё для каждого процесса и потока."""
+    return path.with_name(f"{path.name}.{os.getpid()}-{get_ident()}.tmp")
+
+def write_docx(path: Path, paragraphs) -> Path:
+    """Пишет DOCX из готовых <w:p> через временный файл, чтобы не оставить битый документ.
+
+    paragraphs может быть генератором: document.xml пишется в архив потоком, кусками
+    по мере поступления, так что целая книга не собирается в памяти одной строкой.
+    """
+    parts, head, tail = _load_template()
+    tmp = temp_path(path)
+    try:
+        with open(tmp, "w+b") as f:
+            f.write(parts)
+            f.seek(0)
+            with zipfile.ZipFile(f, "a", zipfile.ZIP_DEFLATED) as z, z.open("word/document.xml", "w") as out:
+                out.write(head.encode("utf-8"))
+                chunk = []
+                for p in paragraphs:
+                    chunk.append(p)
+                    if len(chunk) >= 256:
+                        out.write("".join(chunk).encode("utf-8")); chunk.clear()
+                out.write(("".join(chunk) + tail).encode("utf-8"))
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
 def save_chapter_docx(folder: Path, chapter_title: str, text: str, index: int = None):
     folder.mkdir(parents=True, exist_ok=True)
     base = safe_name(chapter_title)
     filename = f"{index:03d} {base}.docx" if index is not None else f"{base}.docx"
     path = folder / filename
-    doc = Document()
-    h = doc.add_heading(chapter_title, level=1)
-    h.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for line in text.split("\n"):
-        if line.strip():
-            doc.add_paragraph(line.strip())
-        else:
-            doc.add_paragraph()
-    doc.save(path)
-    return path
+    return write_docx(path, chapter_xml(chapter_title, text))